@@ -1,4 +1,5 @@
 import os
+import sys
 import uvicorn
 import json
 from fastapi import FastAPI, HTTPException
@@ -10,25 +11,72 @@ import subprocess
 from pathlib import Path
 import logging
 from fastapi import UploadFile, File
-import shutil
+import asyncio
+import uuid
+import hashlib
+import functools
+import mimetypes
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
 
 # 配置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # 导入核心处理函数和工具
-from single_main import single_main_demo
+import composite_main
+from single_main import single_main_demo, preload_degradation_classes
 from composite_main import composite_main_demo
 from utils.file_io import (
     validate_media_type,
+    media_type_from_name,
     get_media_path,
+    resolve_media_path,
     MEDIA_ROOT,
-    get_file_size,
+    format_file_size,
     generate_output_filename,
+    copy_upload_stream,
+    UPLOAD_CHUNK_SIZE,
     get_media_info as file_get_media_info  # 重命名导入避免冲突
 )
 
-app = FastAPI(title="图像/视频降质可视化系统")
+# 每个进程池工作进程处理的最大任务数（Python 3.11+ 生效）
+POOL_MAX_TASKS_PER_CHILD = 100
+
+# uvicorn工作进程数（多进程启动时由__main__写入WEB_CONCURRENCY，各工作进程据此分摊CPU核）
+WEB_WORKERS = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+# 每个uvicorn工作进程的降质进程池大小：默认按工作进程数均分CPU核，可用DEGRADATION_POOL_WORKERS覆盖
+POOL_WORKERS = int(os.getenv("DEGRADATION_POOL_WORKERS", "0")) or max(1, (os.cpu_count() or 1) // WEB_WORKERS)
+# 进程池中每个任务的逐帧并行线程数：剩余的CPU核按全部池进程均分，避免 工作进程×池进程×线程 超额订阅
+POOL_FRAME_WORKERS = max(1, (os.cpu_count() or 1) // (WEB_WORKERS * POOL_WORKERS))
+
+
+def _init_pool_worker(frame_workers: int) -> None:
+    """进程池工作进程初始化：预加载退化处理类，并限制复合视频任务的逐帧线程数"""
+    preload_degradation_classes()
+    composite_main.FRAME_WORKERS = frame_workers
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """应用生命周期：创建/关闭处理降质任务的进程池"""
+    # 降质处理是NumPy/OpenCV计算密集型任务，放到进程池中既不阻塞事件循环，也能绕过GIL并行
+    # 工作进程启动时预加载所有退化处理类；处理一定数量任务后重建进程，释放累积的内存碎片
+    pool_kwargs = {"max_tasks_per_child": POOL_MAX_TASKS_PER_CHILD} if sys.version_info >= (3, 11) else {}
+    logger.info(f"降质进程池: {POOL_WORKERS}个进程, 每个任务{POOL_FRAME_WORKERS}个逐帧线程 (uvicorn工作进程数: {WEB_WORKERS})")
+    app.state.pool = ProcessPoolExecutor(
+        max_workers=POOL_WORKERS,
+        initializer=_init_pool_worker,
+        initargs=(POOL_FRAME_WORKERS,),
+        **pool_kwargs
+    )
+    try:
+        yield
+    finally:
+        app.state.pool.shutdown(cancel_futures=True)
+
+
+app = FastAPI(title="图像/视频降质可视化系统", lifespan=lifespan)
 
 # 添加CORS中间件解决跨域问题
 app.add_middleware(
@@ -46,6 +94,10 @@ class DegradationConfig(BaseModel):
     name: str = Field(..., description="退化类型（如'composite'或具体退化类型）")
     params: Dict = Field(..., description="退化参数字典")
 
+    def as_config(self) -> Dict[str, Any]:
+        """转为退化管道使用的普通字典"""
+        return {"name": self.name, "params": self.params}
+
 
 class SingleDegradationRequest(BaseModel):
     """前端传来的单个退化请求参数结构"""
@@ -72,15 +124,61 @@ class FileListRequest(BaseModel):
     subdir: Optional[str] = ""  # 子目录，默认为根目录
 
 
+def _save_upload_file(src, file_path: Path) -> None:
+    """先写入同目录临时文件再原子替换，避免上传中断时留下不完整的媒体文件"""
+    temp_path = file_path.with_name(f".{file_path.name}.{uuid.uuid4().hex[:8]}.part")
+    try:
+        with open(temp_path, "wb") as buffer:
+            copy_upload_stream(src, buffer)
+        os.replace(temp_path, file_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def _hash_upload_stream(src) -> str:
+    """计算上传内容的blake2b摘要（只读源文件，读完后恢复读取位置）"""
+    start = src.tell()
+    digest = hashlib.blake2b(digest_size=16)
+    for chunk in iter(lambda: src.read(UPLOAD_CHUNK_SIZE), b""):
+        digest.update(chunk)
+    src.seek(start)
+    return digest.hexdigest()
+
+
+def _save_upload_deduplicated(src, filename: str) -> Path:
+    """按内容摘要保存上传文件，相同内容已存在时直接复用，不再写盘
+
+    Returns:
+        保存（或复用）后的文件路径，文件名为 摘要+原扩展名
+    """
+    digest = _hash_upload_stream(src)
+    file_path = MEDIA_ROOT / f"{digest}{Path(filename).suffix}"
+    if file_path.exists():
+        logger.info(f"上传内容已存在，复用文件: {file_path.name}")
+        return file_path
+
+    _save_upload_file(src, file_path)
+    return file_path
+
+
+async def _run_in_process_pool(func, *args, **kwargs):
+    """在进程池中执行同步的计算密集型函数并等待结果"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(app.state.pool, functools.partial(func, *args, **kwargs))
+
+
 # 单个降质处理接口
 @app.post("/api/single-degradation")
 async def process_single_degradation(request: SingleDegradationRequest):
     try:
         logger.info(f"开始单降质处理: {request.media_path}, 类型: {request.degradation_type}")
 
-        # 获取文件绝对路径
+        # 获取文件绝对路径（同时得到stat结果，处理函数不再重复检查文件）
         try:
-            full_path = get_media_path(request.media_path)
+            resolved = resolve_media_path(request.media_path)
+            full_path = resolved.path
             logger.info(f"文件路径解析成功: {full_path}")
         except FileNotFoundError as e:
             logger.error(f"文件不存在: {str(e)}")
@@ -92,12 +190,14 @@ async def process_single_degradation(request: SingleDegradationRequest):
             logger.error(msg)
             raise ValueError(msg)
 
-        # 调用处理函数
-        result = single_main_demo(
+        # 调用处理函数（在进程池中执行，避免阻塞事件循环）
+        result = await _run_in_process_pool(
+            single_main_demo,
             media_path=full_path,
             media_type=request.media_type,
             degradation_type=request.degradation_type,
-            degradation_params=request.params
+            degradation_params=request.params,
+            file_stat=resolved.stat
         )
 
         logger.info(f"单降质处理成功: {request.media_path}")
@@ -115,10 +215,8 @@ async def upload_file(file: UploadFile = File(...)):
         if not MEDIA_ROOT.exists():
             MEDIA_ROOT.mkdir(parents=True, exist_ok=True)
 
-        # 保存文件到 MEDIA_ROOT 目录
-        file_path = MEDIA_ROOT / file.filename
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        # 按内容去重保存到 MEDIA_ROOT 目录（在线程中执行，避免大文件阻塞事件循环）
+        file_path = await asyncio.to_thread(_save_upload_deduplicated, file.file, file.filename)
 
         # 返回文件相对路径
         relative_path = str(file_path.relative_to(MEDIA_ROOT))
@@ -143,9 +241,10 @@ async def process_composite_degradation(request: CompositeDegradationRequest):
     try:
         logger.info(f"开始复合降质处理: {request.media_path}")
 
-        # 获取文件绝对路径
+        # 获取文件绝对路径（同时得到stat结果，处理函数不再重复检查文件）
         try:
-            full_path = get_media_path(request.media_path)
+            resolved = resolve_media_path(request.media_path)
+            full_path = resolved.path
             logger.info(f"文件路径解析成功: {full_path}")
         except FileNotFoundError as e:
             logger.error(f"文件不存在: {str(e)}")
@@ -157,18 +256,20 @@ async def process_composite_degradation(request: CompositeDegradationRequest):
             logger.error(msg)
             raise ValueError(msg)
 
-        # 转换配置为字典（Pydantic模型转普通字典）
-        first_config = request.first_config.dict()
-        second_config = request.second_config.dict()
-        third_config = request.third_config.dict() if request.third_config else None
+        # 转换配置为字典（直接取已解析的字段，避免Pydantic逐字段反射转换）
+        first_config = request.first_config.as_config()
+        second_config = request.second_config.as_config()
+        third_config = request.third_config.as_config() if request.third_config else None
 
-        # 调用复合处理函数
-        result = composite_main_demo(
+        # 调用复合处理函数（在进程池中执行，避免阻塞事件循环）
+        result = await _run_in_process_pool(
+            composite_main_demo,
             media_path=full_path,
             media_type=request.media_type,
             first_config=first_config,
             second_config=second_config,
-            third_config=third_config
+            third_config=third_config,
+            file_stat=resolved.stat
         )
 
         logger.info(f"复合降质处理成功: {request.media_path}")
@@ -210,16 +311,48 @@ async def get_file(path: str):
     try:
         logger.info(f"获取文件: {path}")
         full_path = get_media_path(path)
+        # 返回真实的MIME类型并内联展示，浏览器可直接播放并发起Range请求（Starlette会使用sendfile发送文件）
+        media_type, _ = mimetypes.guess_type(str(full_path))
         return FileResponse(
             full_path,
             filename=os.path.basename(full_path),
-            media_type="application/octet-stream"
+            media_type=media_type or "application/octet-stream",
+            content_disposition_type="inline"
         )
     except Exception as e:
         logger.error(f"获取文件失败: {str(e)}", exc_info=True)
         raise HTTPException(status_code=400, detail=str(e))
 
 
+def _scan_media_dir(target_dir: Path) -> List[Dict[str, Any]]:
+    """列出目录下的媒体文件（按修改时间倒序）
+
+    使用os.scandir遍历，每个文件只stat一次，大小和修改时间都取自同一结果
+    """
+    file_list = []
+    with os.scandir(target_dir) as entries:
+        for entry in entries:
+            try:
+                if not entry.is_file():
+                    continue
+                media_type = media_type_from_name(entry.name)
+                if media_type:
+                    entry_stat = entry.stat()
+                    file_list.append({
+                        "name": entry.name,
+                        "path": os.path.relpath(entry.path, MEDIA_ROOT),
+                        "type": media_type,
+                        "size": entry_stat.st_size,
+                        "size_human": format_file_size(entry_stat.st_size),
+                        "modified": entry_stat.st_mtime
+                    })
+            except OSError:
+                continue
+
+    file_list.sort(key=lambda x: x["modified"], reverse=True)
+    return file_list
+
+
 # 获取文件列表接口
 @app.post("/api/file-list")
 async def get_file_list(request: FileListRequest):
@@ -232,25 +365,8 @@ async def get_file_list(request: FileListRequest):
         if not target_dir.exists() or not target_dir.is_dir():
             raise ValueError(f"目录不存在: {request.subdir}")
 
-        file_list = []
-        for item in target_dir.iterdir():
-            if item.is_file():
-                try:
-                    is_image = validate_media_type(str(item), "image")
-                    is_video = validate_media_type(str(item), "video")
-                    if is_image or is_video:
-                        size_bytes, size_human = get_file_size(str(item))
-                        rel_path = str(item.relative_to(MEDIA_ROOT))
-                        file_list.append({
-                            "name": item.name, "path": rel_path,
-                            "type": "image" if is_image else "video",
-                            "size": size_bytes, "size_human": size_human,
-                            "modified": item.stat().st_mtime
-                        })
-                except Exception:
-                    continue
-
-        file_list.sort(key=lambda x: x["modified"], reverse=True)
+        # 目录遍历和stat都是阻塞IO，放到线程中执行，避免大目录阻塞事件循环
+        file_list = await asyncio.to_thread(_scan_media_dir, target_dir)
         return {
             "status": "success",
             "data": {
@@ -304,5 +420,19 @@ async def health_check():
 
 if __name__ == "__main__":
     logger.info(f"媒体文件根目录: {MEDIA_ROOT}")
-    logger.info("启动服务...")
-    uvicorn.run("app:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    # 开发模式（设置DEV环境变量）单进程热重载；生产模式多进程绕过GIL并行处理计算密集的请求
+    dev_mode = bool(os.getenv("DEV"))
+    workers = None if dev_mode else (os.cpu_count() or 2) * 2 + 1
+    logger.info(f"启动服务... (开发模式: {dev_mode}, 工作进程数: {workers or 1})")
+    # 工作进程继承环境变量，据此把CPU核分摊到各自的降质进程池
+    os.environ["WEB_CONCURRENCY"] = str(workers or 1)
+    # loop/http为auto时，安装了uvloop/httptools会自动启用（Windows不支持uvloop，自动回退到asyncio）
+    uvicorn.run(
+        "app:app",
+        host="0.0.0.0",
+        port=8000,
+        loop="auto",
+        http="auto",
+        reload=dev_mode,
+        workers=workers
+    )
\ No newline at end of file
@@ -1,11 +1,18 @@
 import os
+import glob
+import hashlib
+import json
+import shutil
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from functools import partial
+from typing import Dict, List, Any, Optional, Iterable, Iterator, Tuple, Callable
 import logging
 
+import numpy as np
+
 from utils.image_processor import ImageProcessor
 from utils.video_processor import VideoProcessor
-from utils.file_io import generate_output_filename
+from utils.file_io import generate_output_filename, PROCESSED_DIR
 from single_main import load_degradation_class, DEGRADATION_CLASSES
 
 # 配置日志
@@ -15,6 +22,13 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# 复合处理结果缓存：相同文件（路径+修改时间+大小）和相同配置的请求直接复用上次的输出
+PIPELINE_CACHE_DIR = os.path.join(PROCESSED_DIR, ".pipeline_cache")
+PIPELINE_CACHE_MAX_ENTRIES = 64
+
+# 每个视频任务的逐帧并行线程数上限（None表示使用全部CPU核；服务端按进程池大小分摊CPU核后设置）
+FRAME_WORKERS: Optional[int] = None
+
 
 class DegradationPipeline:
     """退化处理管道，用于组合多种退化处理"""
@@ -30,6 +44,15 @@ class DegradationPipeline:
         """
         self.degradations = []
         self._validate_and_load_degradations(degradation_configs)
+        self._stages = self._build_stages()
+        self._steps = self._compile_steps()
+
+    @property
+    def frame_workers(self) -> int:
+        """视频逐帧处理可用的并行线程数（含有状态的降质时只能串行）"""
+        if any(deg.stateful for deg in self.degradations):
+            return 1
+        return FRAME_WORKERS or os.cpu_count() or 1
 
     def _validate_and_load_degradations(self, configs: List[Dict]) -> None:
         """验证并加载所有退化处理类"""
@@ -85,6 +108,63 @@ class DegradationPipeline:
             except Exception as e:
                 raise ValueError(f"加载退化处理'{deg_type}'失败: {str(e)}") from e
 
+    def _build_stages(self) -> List[List[Any]]:
+        """把相邻的、支持原地处理的退化合并为一个融合组
+
+        融合组内的退化在同一个float32缓冲区上依次执行，只在组的首尾各做一次类型转换
+
+        Returns:
+            分组后的退化列表，每组为一个列表（普通退化单独成组）
+        """
+        stages: List[List[Any]] = []
+        for deg in self.degradations:
+            if deg.supports_inplace and stages and stages[-1][-1].supports_inplace:
+                stages[-1].append(deg)
+            else:
+                stages.append([deg])
+
+        fused = [len(group) for group in stages if len(group) > 1]
+        if fused:
+            logger.info(f"融合逐元素退化: {fused}")
+        return stages
+
+    def _compile_steps(self) -> List[Tuple[int, str, Callable[[np.ndarray], np.ndarray]]]:
+        """把分组结果预先展开为 (序号, 名称, 可调用对象) 列表
+
+        分组判断、名称拼接和方法查找都在构造时完成，apply每帧只需依次调用
+        """
+        steps = []
+        idx = 1
+        for group in self._stages:
+            names = "+".join(deg.__class__.__name__ for deg in group)
+            if len(group) > 1:
+                func = partial(self._apply_fused, group)
+            else:
+                func = group[0].apply
+            steps.append((idx, names, func))
+            idx += len(group)
+        return steps
+
+    @staticmethod
+    def _apply_fused(group: List[Any], data: np.ndarray) -> np.ndarray:
+        """在一个float32工作缓冲区上依次执行融合组内的退化（缓冲区由组内第一个退化复用）"""
+        out = group[0]._scratch_buffer('fused', data.shape)
+        np.copyto(out, data, casting='unsafe')
+        for deg in group:
+            deg.apply_inplace(out)
+        return out.astype(np.uint8)
+
+    def apply_iter(self, frames: Iterable[np.ndarray]) -> Iterator[np.ndarray]:
+        """逐帧应用退化管道，按输入顺序产出结果（无状态管道按帧并行）
+
+        Args:
+            frames: 输入帧迭代器
+
+        Returns:
+            处理后帧的迭代器
+        """
+        return VideoProcessor.iter_processed_frames(frames, self.apply, max_workers=self.frame_workers)
+
     def apply(self, data: Any) -> Any:
         """应用所有退化处理
 
@@ -97,15 +177,20 @@ class DegradationPipeline:
         Raises:
             RuntimeError: 当处理过程中出现错误时
         """
+        return self._run_steps(self._steps, data)
+
+    @staticmethod
+    def _run_steps(steps: List[Tuple[int, str, Callable[[np.ndarray], np.ndarray]]], data: Any) -> Any:
+        """依次执行预编译的处理步骤"""
         result = data
-        for idx, deg in enumerate(self.degradations, 1):
+        for idx, names, step in steps:
             try:
-                result = deg.apply(result)
+                result = step(result)
                 if result is None:
-                    raise RuntimeError(f"第{idx}个退化处理({deg.__class__.__name__})返回空结果")
+                    raise RuntimeError(f"第{idx}个退化处理({names})返回空结果")
             except Exception as e:
                 raise RuntimeError(
-                    f"第{idx}个退化处理({deg.__class__.__name__})执行失败"
+                    f"第{idx}个退化处理({names})执行失败"
                 ) from e
         return result
 
@@ -162,34 +247,89 @@ def process_video_with_pipeline(video_path: str, pipeline: DegradationPipeline)
     """
     logger.info(f"开始处理视频: {video_path}")
 
-    # 读取视频
-    frames, video_info = VideoProcessor.read_video(video_path)
-    if not frames:
-        raise ValueError(f"无法读取视频帧: {video_path}")
+    # 读取视频信息（只读容器头，不解码帧）
+    video_info = VideoProcessor.probe(video_path)
     if not video_info or "fps" not in video_info:
         raise ValueError(f"视频信息不完整: {video_info}")
 
-    # 应用退化管道到每一帧
-    processed_frames = VideoProcessor.process_video_frames(frames, pipeline.apply)
-
     # 确保输出目录存在
     _ensure_output_dir()
 
-    # 生成输出路径并保存
+    # 生成输出路径
     output_filename = generate_output_filename(video_path, "composite")
     output_path = str(Path("processed") / output_filename)
-    VideoProcessor.write_video(processed_frames, output_path, fps=video_info["fps"])
+
+    # 读取→退化→编码流水线：逐帧流过管道，内存中只保留正在处理的帧
+    frames = VideoProcessor.iter_frames(video_path)
+    processed_frames = pipeline.apply_iter(frames)
+    output_path = VideoProcessor.write_video_stream(processed_frames, output_path, fps=video_info["fps"])
 
     logger.info(f"视频处理完成，保存至: {output_path}")
     return output_path
 
 
+def _pipeline_cache_key(
+        media_path: str,
+        media_type: str,
+        configs: List[Dict],
+        file_stat: Optional[os.stat_result] = None
+) -> str:
+    """根据文件元数据和退化配置计算缓存键（不读取文件内容）"""
+    if file_stat is None:
+        file_stat = os.stat(media_path)
+    raw = "|".join([
+        media_path,
+        str(file_stat.st_mtime_ns),
+        str(file_stat.st_size),
+        media_type,
+        json.dumps(configs, sort_keys=True, ensure_ascii=False, default=str)
+    ])
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _link_or_copy(src: str, dst: str) -> None:
+    """优先创建硬链接（不额外占用磁盘），跨文件系统等情况下退回复制"""
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def _load_cached_output(cache_key: str, media_path: str) -> Optional[str]:
+    """命中缓存时生成一份新的输出文件并返回其路径，未命中返回None"""
+    cached = glob.glob(os.path.join(PIPELINE_CACHE_DIR, f"{cache_key}.*"))
+    if not cached:
+        return None
+
+    cached_path = cached[0]
+    output_path = generate_output_filename(media_path, "composite")
+    output_path = os.path.splitext(output_path)[0] + os.path.splitext(cached_path)[1]
+    _link_or_copy(cached_path, output_path)
+    return output_path
+
+
+def _store_cached_output(cache_key: str, output_path: str) -> None:
+    """把处理结果加入缓存，超过上限时按先进先出淘汰最旧的条目"""
+    os.makedirs(PIPELINE_CACHE_DIR, exist_ok=True)
+    cache_path = os.path.join(PIPELINE_CACHE_DIR, cache_key + os.path.splitext(output_path)[1])
+    if not os.path.exists(cache_path):
+        _link_or_copy(output_path, cache_path)
+
+    entries = sorted(
+        (entry for entry in os.scandir(PIPELINE_CACHE_DIR) if entry.is_file()),
+        key=lambda entry: entry.stat().st_mtime
+    )
+    for entry in entries[:max(0, len(entries) - PIPELINE_CACHE_MAX_ENTRIES)]:
+        os.remove(entry.path)
+
+
 def composite_main_demo(
         media_path: str,
         media_type: str,
         first_config: Dict,
         second_config: Dict,
-        third_config: Optional[Dict] = None
+        third_config: Optional[Dict] = None,
+        file_stat: Optional[os.stat_result] = None
 ) -> Dict[str, Any]:
     """复合退化处理演示主函数
 
@@ -199,15 +339,17 @@ def composite_main_demo(
         first_config: 第一个退化配置
         second_config: 第二个退化配置
         third_config: 第三个退化配置（可选）
+        file_stat: 调用方已解析的绝对路径对应的stat结果（提供时跳过存在性检查）
 
     Returns:
         处理结果字典
     """
     try:
-        # 验证媒体文件存在性
-        media_path = os.path.abspath(media_path)
-        if not os.path.exists(media_path):
-            raise FileNotFoundError(f"媒体文件不存在: {media_path}")
+        # 验证媒体文件存在性（调用方已通过resolve_media_path校验时跳过）
+        if file_stat is None:
+            media_path = os.path.abspath(media_path)
+            if not os.path.exists(media_path):
+                raise FileNotFoundError(f"媒体文件不存在: {media_path}")
 
         # 验证媒体类型
         media_type = media_type.lower()
@@ -223,14 +365,32 @@ def composite_main_demo(
         if len(degradation_configs) < 2:
             raise ValueError("至少需要提供两个退化配置")
 
-        # 创建退化处理管道
-        pipeline = DegradationPipeline(degradation_configs)
-
-        # 根据媒体类型处理
-        if media_type == "image":
-            processed_path = process_image_with_pipeline(media_path, pipeline)
-        else:  # video
-            processed_path = process_video_with_pipeline(media_path, pipeline)
+        # 相同文件和配置已处理过时直接复用结果（缓存出错不影响正常处理）
+        cache_key = None
+        processed_path = None
+        try:
+            cache_key = _pipeline_cache_key(media_path, media_type, degradation_configs, file_stat)
+            processed_path = _load_cached_output(cache_key, media_path)
+            if processed_path:
+                logger.info(f"命中复合处理缓存: {cache_key} -> {processed_path}")
+        except Exception as e:
+            logger.warning(f"读取复合处理缓存失败: {str(e)}")
+
+        if processed_path is None:
+            # 创建退化处理管道
+            pipeline = DegradationPipeline(degradation_configs)
+
+            # 根据媒体类型处理
+            if media_type == "image":
+                processed_path = process_image_with_pipeline(media_path, pipeline)
+            else:  # video
+                processed_path = process_video_with_pipeline(media_path, pipeline)
+
+            if cache_key:
+                try:
+                    _store_cached_output(cache_key, processed_path)
+                except Exception as e:
+                    logger.warning(f"写入复合处理缓存失败: {str(e)}")
 
         return {
             "original_path": media_path,
@@ -1,5 +1,6 @@
 import numpy as np
 import logging
+import threading
 from abc import ABC, abstractmethod
 from typing import Dict, Any, Optional
 
@@ -19,6 +20,10 @@ class BaseDegradation(ABC):
     - validate_params(): 验证参数合法性
     - apply(): 应用降质处理
     """
+    # 是否在帧之间保存状态（如帧计数器）；有状态的降质必须按帧顺序串行处理
+    stateful = False
+    # 是否支持在float32工作缓冲区上原地处理（逐元素类降质，可被管道融合）
+    supports_inplace = False
 
     def __init__(self, params: Optional[Dict[str, Any]] = None):
         """
@@ -29,6 +34,8 @@ class BaseDegradation(ABC):
         """
         self.params = params or {}  # 参数默认为空字典
         self._media_type = None  # 媒体类型：image 或 video
+        self._validated_signature = None  # 已通过验证的输入(类型, 形状, dtype)，相同输入不再重复验证
+        self._scratch = threading.local()  # 按线程缓存的临时工作缓冲区（见_scratch_buffer）
         self._validate_and_set_params()  # 验证并设置参数
 
     def _validate_and_set_params(self) -> None:
@@ -94,6 +101,42 @@ class BaseDegradation(ABC):
         """
         pass
 
+    def apply_inplace(self, out: np.ndarray) -> None:
+        """
+        在float32工作缓冲区上原地应用降质（可选）
+
+        逐元素类降质可以重写此方法并设置 supports_inplace = True，
+        管道会把相邻的此类降质融合成对同一缓冲区的连续操作，省去中间的uint8结果。
+        实现需要在返回前把缓冲区裁剪到 [0, 255]
+
+        Args:
+            out: float32类型的媒体数据，处理结果直接写回
+        """
+        raise NotImplementedError(f"{self.__class__.__name__} 不支持原地处理")
+
+    def _scratch_buffer(self, name: str, shape: tuple, dtype=np.float32) -> np.ndarray:
+        """
+        获取可复用的临时工作缓冲区，视频连续帧形状不变时不再重复分配
+
+        每个名称在每个线程中只保留最近一次形状/类型的缓冲区（并行处理帧的线程互不干扰）。
+        缓冲区内容在下次调用时会被覆盖，只能用于不会返回给调用者的中间结果
+
+        Args:
+            name: 缓冲区名称（同一次处理中的不同中间结果需要使用不同名称）
+            shape: 缓冲区形状
+            dtype: 缓冲区数据类型
+
+        Returns:
+            未初始化的ndarray
+        """
+        buffers = getattr(self._scratch, 'buffers', None)
+        if buffers is None:
+            buffers = self._scratch.buffers = {}
+        buf = buffers.get(name)
+        if buf is None or buf.shape != shape or buf.dtype != dtype:
+            buf = buffers[name] = np.empty(shape, dtype=dtype)
+        return buf
+
     def preprocess(self, data: np.ndarray) -> np.ndarray:
         """
         预处理数据（可选）
@@ -122,8 +165,13 @@ class BaseDegradation(ABC):
             后处理后的媒体数据
         """
         # 默认将数据裁剪到有效范围 [0, 255] 并转换为uint8类型
-        data = np.clip(data, 0, 255)
-        return data.astype(np.uint8)
+        # uint8数据本身就在有效范围内，无需裁剪和拷贝
+        if data.dtype == np.uint8:
+            return data
+        # 裁剪与类型转换合并为一次遍历：clip直接写入uint8输出（unsafe转换为截断，与astype一致）
+        out = np.empty(data.shape, dtype=np.uint8)
+        np.clip(data, 0, 255, out=out, casting='unsafe')
+        return out
 
     def process(self, data: np.ndarray) -> np.ndarray:
         """
@@ -136,15 +184,18 @@ class BaseDegradation(ABC):
             处理后的媒体数据
         """
         try:
-            # 验证输入数据
-            self._validate_input_data(data)
+            # 验证输入数据（视频连续帧的类型/形状/dtype相同，只在首帧或输入变化时验证）
+            signature = (type(data), getattr(data, 'shape', None), getattr(data, 'dtype', None))
+            if signature != self._validated_signature:
+                self._validate_input_data(data)
+                self._validated_signature = signature
 
             # 完整处理流程
             preprocessed = self.preprocess(data)
             degraded = self.apply(preprocessed)
             result = self.postprocess(degraded)
 
-            logger.info(f"处理完成: {self.__class__.__name__}")
+            logger.info("处理完成: %s", self.__class__.__name__)  # 每帧调用，延迟格式化
             return result
         except Exception as e:
             logger.error(f"处理失败: {str(e)}")
@@ -1,15 +1,56 @@
+import json
+import cv2
 import numpy as np
 import logging
-from typing import Dict, Any, Optional
+from functools import lru_cache
+from typing import Dict, Any, Optional, Tuple
 from core.base_degradation import BaseDegradation
 from degradations.blur import BlurDegradation
 from degradations.resample import ResampleDegradation
 from degradations.noise import NoiseDegradation
 from degradations.compression import CompressionDegradation
 
+# 可选依赖：Numba（uint8 -> [0, 1] float32 的并行转换内核，未安装时使用NumPy）
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
 # 配置日志
 logger = logging.getLogger(__name__)
 
+if njit is not None:
+    @njit(parallel=True, cache=True)
+    def _u8_to_unit_float(data, out):
+        """out = data / 255（float32），每个字节只读一次、结果只写一次"""
+        flat_in = data.reshape(-1)
+        flat_out = out.reshape(-1)
+        for i in prange(flat_in.size):
+            flat_out[i] = flat_in[i] / np.float32(255.0)
+
+
+@lru_cache(maxsize=32)
+def _create_degradations(params_json: str, media_type: Optional[str]) -> Tuple[BaseDegradation, ...]:
+    """创建第一阶段的子降质处理器（相同参数和媒体类型的阶段共享同一组已初始化的实例）
+
+    Args:
+        params_json: 阶段参数的JSON字符串（sort_keys，作为缓存键）
+        media_type: 媒体类型
+
+    Returns:
+        (模糊, 重采样, 噪声, 压缩) 处理器元组
+    """
+    params = json.loads(params_json)
+    degradations = (
+        BlurDegradation(params.get('blur', {})),  # 模糊处理器
+        ResampleDegradation(params.get('resample', {})),  # 重采样处理器
+        NoiseDegradation(params.get('noise', {})),  # 噪声处理器
+        CompressionDegradation(params.get('compression', {}))  # 压缩处理器
+    )
+    for degradation in degradations:
+        degradation.media_type = media_type  # 传递媒体类型
+    return degradations
+
 
 class Stage1Degradation(BaseDegradation):
     """
@@ -73,22 +114,11 @@ class Stage1Degradation(BaseDegradation):
                 raise ValueError("'compression' 参数必须是字典类型")
 
     def _init_degradations(self) -> None:
-        """初始化所有子降质处理器（延迟初始化，避免未使用时的资源浪费）"""
-        # 初始化模糊处理器
-        self._blur = BlurDegradation(self.params.get('blur', {}))
-        self._blur.media_type = self.media_type  # 传递媒体类型
-
-        # 初始化重采样处理器
-        self._resample = ResampleDegradation(self.params.get('resample', {}))
-        self._resample.media_type = self.media_type
-
-        # 初始化噪声处理器
-        self._noise = NoiseDegradation(self.params.get('noise', {}))
-        self._noise.media_type = self.media_type
-
-        # 初始化压缩处理器
-        self._compression = CompressionDegradation(self.params.get('compression', {}))
-        self._compression.media_type = self.media_type
+        """初始化所有子降质处理器（延迟初始化，避免未使用时的资源浪费；相同参数复用缓存的实例）"""
+        params_json = json.dumps(self.params, sort_keys=True, default=str)
+        self._blur, self._resample, self._noise, self._compression = _create_degradations(
+            params_json, self.media_type
+        )
 
     def apply(self, data: np.ndarray) -> np.ndarray:
         """
@@ -104,27 +134,27 @@ class Stage1Degradation(BaseDegradation):
         if self._blur is None:
             self._init_degradations()
 
-        # 记录输入数据信息
+        # 记录输入数据信息（视频逐帧调用；日志参数延迟格式化，级别未启用时不拼接字符串）
         logger.info(
-            f"第一阶段降质开始 - 输入数据: 类型={self.media_type}, "
-            f"形状={data.shape}, 数据类型={data.dtype}"
+            "第一阶段降质开始 - 输入数据: 类型=%s, 形状=%s, 数据类型=%s",
+            self.media_type, data.shape, data.dtype
         )
 
         # 1. 应用模糊处理
         blurred_data = self._blur.process(data)
-        logger.debug(f"模糊处理完成 - 输出形状: {blurred_data.shape}")
+        logger.debug("模糊处理完成 - 输出形状: %s", blurred_data.shape)
 
         # 2. 应用重采样处理（下采样）
         resampled_data = self._resample.process(blurred_data)
-        logger.debug(f"重采样处理完成 - 输出形状: {resampled_data.shape}")
+        logger.debug("重采样处理完成 - 输出形状: %s", resampled_data.shape)
 
         # 3. 应用噪声处理
         noisy_data = self._noise.process(resampled_data)
-        logger.debug(f"噪声处理完成 - 输出形状: {noisy_data.shape}")
+        logger.debug("噪声处理完成 - 输出形状: %s", noisy_data.shape)
 
         # 4. 应用压缩处理
         compressed_data = self._compression.process(noisy_data)
-        logger.debug(f"压缩处理完成 - 输出形状: {compressed_data.shape}")
+        logger.debug("压缩处理完成 - 输出形状: %s", compressed_data.shape)
 
         logger.info("第一阶段降质处理完成")
         return compressed_data
@@ -143,7 +173,13 @@ class Stage1Degradation(BaseDegradation):
         """
         # 示例：将数据转换为float32类型，便于后续处理
         if data.dtype == np.uint8:
-            return data.astype(np.float32) / 255.0
+            # 直接生成float32结果，不再产生astype的中间副本
+            # 结果只在本阶段内部流转（各子降质都输出新数组），使用复用的工作缓冲区
+            out = self._scratch_buffer('preprocess', data.shape)
+            if njit is not None and data.flags.c_contiguous:
+                _u8_to_unit_float(data, out)
+                return out
+            return np.divide(data, np.float32(255.0), out=out)
         return data
 
     def postprocess(self, data: np.ndarray) -> np.ndarray:
@@ -160,5 +196,8 @@ class Stage1Degradation(BaseDegradation):
         """
         # 示例：将数据转换回uint8类型（0-255范围）
         if np.issubdtype(data.dtype, np.floating):
-            return (np.clip(data, 0.0, 1.0) * 255).astype(np.uint8)
+            # 缩放与饱和转换在一次遍历中完成（按单通道处理，<0截为0、>1截为255）
+            return cv2.multiply(data.reshape(-1, 1), 255.0, dtype=cv2.CV_8U).reshape(data.shape)
+        if data.dtype == np.uint8:
+            return data
         return np.clip(data, 0, 255).astype(np.uint8)
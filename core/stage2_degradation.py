@@ -1,6 +1,11 @@
+import os
+import json
+import cv2
 import numpy as np
 import logging
-from typing import Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, Any, Optional, Tuple
 from core.base_degradation import BaseDegradation
 from degradations.blur import BlurDegradation
 from degradations.resample import ResampleDegradation
@@ -11,6 +16,41 @@ from degradations.compression import CompressionDegradation
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=32)
+def _create_degradations(params_json: str, media_type: Optional[str]) -> Tuple[BaseDegradation, ...]:
+    """创建第二阶段的子降质处理器，设置更强的默认参数（相同参数和媒体类型的阶段共享同一组已初始化的实例）
+
+    Args:
+        params_json: 阶段参数的JSON字符串（sort_keys，作为缓存键）
+        media_type: 媒体类型
+
+    Returns:
+        (模糊, 重采样, 噪声, 压缩) 处理器元组
+    """
+    params = json.loads(params_json)
+
+    # 模糊处理器（默认参数比第一阶段强）
+    default_blur_params = {'kernel_size': 7, 'sigma': 1.8}
+    blur = BlurDegradation({**default_blur_params, **params.get('blur', {})})
+
+    # 重采样处理器（默认分辨率比第一阶段低）
+    default_resample_params = {'width': 480, 'height': 270}
+    resample = ResampleDegradation({**default_resample_params, **params.get('resample', {})})
+
+    # 噪声处理器（默认噪声比第一阶段强）
+    default_noise_params = {'type': 'gaussian', 'mean': 0, 'var': 0.003}
+    noise = NoiseDegradation({**default_noise_params, **params.get('noise', {})})
+
+    # 压缩处理器（默认压缩率比第一阶段高）
+    default_compression_params = {'quality': 30}
+    compression = CompressionDegradation({**default_compression_params, **params.get('compression', {})})
+
+    degradations = (blur, resample, noise, compression)
+    for degradation in degradations:
+        degradation.media_type = media_type  # 传递媒体类型
+    return degradations
+
+
 class Stage2Degradation(BaseDegradation):
     """
     第二阶段降质处理类：在第一阶段基础上增强降质效果
@@ -87,30 +127,11 @@ class Stage2Degradation(BaseDegradation):
                     raise ValueError("'compression.quality' 必须在10-70之间（第二阶段建议范围）")
 
     def _init_degradations(self) -> None:
-        """初始化所有子降质处理器，设置更强的默认参数"""
-        # 初始化模糊处理器（默认参数比第一阶段强）
-        default_blur_params = {'kernel_size': 7, 'sigma': 1.8}
-        blur_params = {**default_blur_params, **self.params.get('blur', {})}
-        self._blur = BlurDegradation(blur_params)
-        self._blur.media_type = self.media_type
-
-        # 初始化重采样处理器（默认分辨率比第一阶段低）
-        default_resample_params = {'width': 480, 'height': 270}
-        resample_params = {**default_resample_params, **self.params.get('resample', {})}
-        self._resample = ResampleDegradation(resample_params)
-        self._resample.media_type = self.media_type
-
-        # 初始化噪声处理器（默认噪声比第一阶段强）
-        default_noise_params = {'type': 'gaussian', 'mean': 0, 'var': 0.003}
-        noise_params = {**default_noise_params, **self.params.get('noise', {})}
-        self._noise = NoiseDegradation(noise_params)
-        self._noise.media_type = self.media_type
-
-        # 初始化压缩处理器（默认压缩率比第一阶段高）
-        default_compression_params = {'quality': 30}
-        compression_params = {**default_compression_params, **self.params.get('compression', {})}
-        self._compression = CompressionDegradation(compression_params)
-        self._compression.media_type = self.media_type
+        """初始化所有子降质处理器（相同参数复用缓存的实例）"""
+        params_json = json.dumps(self.params, sort_keys=True, default=str)
+        self._blur, self._resample, self._noise, self._compression = _create_degradations(
+            params_json, self.media_type
+        )
 
     def apply(self, data: np.ndarray) -> np.ndarray:
         """
@@ -127,25 +148,25 @@ class Stage2Degradation(BaseDegradation):
 
         # 记录输入数据信息
         logger.info(
-            f"第二阶段降质开始 - 输入数据: 类型={self.media_type}, "
-            f"形状={data.shape}, 数据类型={data.dtype}"
+            "第二阶段降质开始 - 输入数据: 类型=%s, 形状=%s, 数据类型=%s",
+            self.media_type, data.shape, data.dtype
         )
 
         # 1. 应用更强的模糊处理
         blurred_data = self._blur.process(data)
-        logger.debug(f"第二阶段模糊处理完成 - 输出形状: {blurred_data.shape}")
+        logger.debug("第二阶段模糊处理完成 - 输出形状: %s", blurred_data.shape)
 
         # 2. 应用更低分辨率的重采样
         resampled_data = self._resample.process(blurred_data)
-        logger.debug(f"第二阶段重采样处理完成 - 输出形状: {resampled_data.shape}")
+        logger.debug("第二阶段重采样处理完成 - 输出形状: %s", resampled_data.shape)
 
         # 3. 应用更强的噪声
         noisy_data = self._noise.process(resampled_data)
-        logger.debug(f"第二阶段噪声处理完成 - 输出形状: {noisy_data.shape}")
+        logger.debug("第二阶段噪声处理完成 - 输出形状: %s", noisy_data.shape)
 
         # 4. 应用更高压缩率的压缩
         compressed_data = self._compression.process(noisy_data)
-        logger.debug(f"第二阶段压缩处理完成 - 输出形状: {compressed_data.shape}")
+        logger.debug("第二阶段压缩处理完成 - 输出形状: %s", compressed_data.shape)
 
         logger.info("第二阶段降质处理完成")
         return compressed_data
@@ -159,29 +180,41 @@ class Stage2Degradation(BaseDegradation):
 
     def _edge_enhancement(self, data: np.ndarray) -> np.ndarray:
         """边缘增强预处理（可选），用于在强降质下保留更多细节"""
-        from scipy.ndimage import gaussian_filter
-
         # 仅对图像/视频帧应用边缘增强
         if len(data.shape) == 3:  # 单张图像
-            blurred = gaussian_filter(data, sigma=1)
-            return np.clip(data * 1.1 - blurred * 0.1, 0.0, 1.0)
+            return self._enhance_frame(data)
         elif len(data.shape) == 4:  # 视频帧序列
-            result = []
-            for frame in data:
-                blurred = gaussian_filter(frame, sigma=1)
-                enhanced = np.clip(frame * 1.1 - blurred * 0.1, 0.0, 1.0)
-                result.append(enhanced)
-            return np.array(result)
+            # 各帧相互独立，OpenCV执行时释放GIL，用线程池并行处理并直接写入预分配的结果数组
+            result = np.empty(data.shape, dtype=data.dtype)
+
+            def _enhance(i: int) -> None:
+                self._enhance_frame(data[i], out=result[i])
+
+            max_workers = max(1, min(len(data), os.cpu_count() or 1))
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                list(executor.map(_enhance, range(len(data))))
+            return result
         return data
 
+    @staticmethod
+    def _enhance_frame(frame: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """单帧反锐化：clip(frame * 1.1 - blur(frame) * 0.1, 0, 1)
+
+        高斯模糊只在空间维度上进行（sigma=1，9x9核，reflect边界与原scipy实现一致），
+        加权相减由cv2.addWeighted一次完成
+        """
+        blurred = cv2.GaussianBlur(frame, (0, 0), sigmaX=1, borderType=cv2.BORDER_REFLECT)
+        out = cv2.addWeighted(frame, 1.1, blurred, -0.1, 0, dst=out)
+        np.clip(out, 0.0, 1.0, out=out)
+        return out
+
     def postprocess(self, data: np.ndarray) -> np.ndarray:
         """第二阶段全局后处理"""
         # 第二阶段降质更强，增加对比度补偿
         if np.issubdtype(data.dtype, np.floating):
-            # 对比度增强（简单线性拉伸）
-            min_val = data.min()
-            max_val = data.max()
-            if max_val > min_val:  # 避免除零
-                data = (data - min_val) / (max_val - min_val)
+            # 对比度增强（简单线性拉伸）：cv2.normalize一次遍历完成拉伸并输出uint8
+            if data.max() > data.min():
+                return cv2.normalize(data, None, 0, 255, cv2.NORM_MINMAX, dtype=cv2.CV_8U)
+            # 常量图像无法拉伸（避免除零），保持原有的直接缩放
             return (data * 255).astype(np.uint8)
         return np.clip(data, 0, 255).astype(np.uint8)
@@ -1,5 +1,8 @@
+import json
+import cv2
 import numpy as np
 import logging
+from functools import lru_cache
 from typing import Dict, Any, Optional, Type
 from core.base_degradation import BaseDegradation
 
@@ -29,6 +32,15 @@ SUPPORTED_DEGRADATIONS = {
 }
 
 
+@lru_cache(maxsize=32)
+def _create_cached_degrader(degradation_type: str, params_json: str, media_type: Optional[str]) -> BaseDegradation:
+    """创建第三阶段降质处理器（相同类型、参数和媒体类型的阶段共享同一个已初始化的实例）"""
+    deg_class: Type[BaseDegradation] = SUPPORTED_DEGRADATIONS[degradation_type]
+    degrader = deg_class(json.loads(params_json))
+    degrader.media_type = media_type
+    return degrader
+
+
 class Stage3Degradation(BaseDegradation):
     """
     第三阶段降质处理类：可选的单一特殊降质类型
@@ -79,10 +91,15 @@ class Stage3Degradation(BaseDegradation):
         if self._degradation_type is None:
             raise ValueError("未初始化降质类型，请先调用validate_params")
 
-        # 获取降质类并初始化
+        # 获取降质类并初始化（有状态的降质如闪烁、抖动带帧计数器，
+        # 以及指定了随机种子的降质，不能在阶段之间共享）
         deg_class: Type[BaseDegradation] = SUPPORTED_DEGRADATIONS[self._degradation_type]
-        self._degrader = deg_class(self.params.get('params', {}))
-        self._degrader.media_type = self.media_type
+        if deg_class.stateful or self.params.get('params', {}).get('seed') is not None:
+            self._degrader = deg_class(self.params.get('params', {}))
+            self._degrader.media_type = self.media_type
+        else:
+            params_json = json.dumps(self.params.get('params', {}), sort_keys=True, default=str)
+            self._degrader = _create_cached_degrader(self._degradation_type, params_json, self.media_type)
 
         logger.info(f"初始化第三阶段降质处理器: {self._degradation_type}")
 
@@ -101,14 +118,14 @@ class Stage3Degradation(BaseDegradation):
 
         # 记录输入数据信息
         logger.info(
-            f"第三阶段降质开始 - 类型: {self._degradation_type}, "
-            f"输入形状: {data.shape}, 媒体类型: {self.media_type}"
+            "第三阶段降质开始 - 类型: %s, 输入形状: %s, 媒体类型: %s",
+            self._degradation_type, data.shape, self.media_type
         )
 
         # 应用选中的降质处理
         result = self._degrader.process(data)
 
-        logger.info(f"第三阶段降质完成 - 输出形状: {result.shape}")
+        logger.info("第三阶段降质完成 - 输出形状: %s", result.shape)
         return result
 
     def preprocess(self, data: np.ndarray) -> np.ndarray:
@@ -120,9 +137,11 @@ class Stage3Degradation(BaseDegradation):
 
     def postprocess(self, data: np.ndarray) -> np.ndarray:
         """第三阶段后处理：根据降质类型做针对性修正"""
-        # 对浮点数据转回uint8
+        # 对浮点数据转回uint8（缩放与饱和转换在一次遍历中完成，按单通道处理）
         if np.issubdtype(data.dtype, np.floating):
-            return (np.clip(data, 0.0, 1.0) * 255).astype(np.uint8)
+            return cv2.multiply(data.reshape(-1, 1), 255.0, dtype=cv2.CV_8U).reshape(data.shape)
+        if data.dtype == np.uint8:
+            return data
         return np.clip(data, 0, 255).astype(np.uint8)
 
     @property
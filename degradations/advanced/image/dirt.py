@@ -6,7 +6,7 @@ from core.base_degradation import BaseDegradation
 class DirtDegradation(BaseDegradation):
     """污点效应退化（支持自定义颜色）"""
     # 新增 spot_color 到允许的参数列表
-    allowed_params = ['num_spots', 'size_range', 'darkness', 'spot_size', 'spot_color']
+    allowed_params = ['num_spots', 'size_range', 'darkness', 'spot_size', 'spot_color', 'seed']
 
     def validate_params(self):
         """验证并处理参数"""
@@ -66,33 +66,52 @@ class DirtDegradation(BaseDegradation):
 
         self.params['spot_color'] = spot_color
 
+        # 5. 随机种子（可选）：实例持有独立的随机数生成器，指定种子时结果可复现
+        seed = self.params.get('seed')
+        if seed is not None:
+            seed = int(seed)
+            self.params['seed'] = seed
+            self.stateful = True  # 随机序列依赖帧的处理顺序，需要按帧串行
+        self._rng = np.random.default_rng(seed)
+
     def apply(self, data: np.ndarray) -> np.ndarray:
-        """应用污点效果（支持自定义颜色）"""
+        """应用污点效果（支持自定义颜色）
+
+        每个污点只在其外接矩形区域内绘制和融合，内存访问量与污点面积成正比，而不是每个污点都复制整幅图像
+        """
+        # 没有污点或污点完全透明时图像不变，直接返回输入（不复制）
+        if self.params['num_spots'] == 0 or self.params['darkness'] == 0.0:
+            return data
+
         result = data.copy()
         h, w = result.shape[:2]
         spot_color = self.params['spot_color']
+        num_spots = self.params['num_spots']
 
-        for _ in range(self.params['num_spots']):
-            # 随机位置
-            x = np.random.randint(0, w)
-            y = np.random.randint(0, h)
+        # 一次性采样所有污点的位置和大小
+        centers = self._rng.integers(0, [w, h], size=(num_spots, 2)).tolist()
+        if self.params['spot_size'] > 0:
+            sizes = [self.params['spot_size']] * num_spots
+        else:
+            sizes = self._rng.integers(
+                self.params['size_range'][0],
+                self.params['size_range'][1] + 1,
+                num_spots
+            ).tolist()
 
-            # 确定污点大小
-            if self.params['spot_size'] > 0:
-                size = self.params['spot_size']
-            else:
-                size = np.random.randint(
-                    self.params['size_range'][0],
-                    self.params['size_range'][1] + 1
-                )
+        # 计算透明度（基于darkness参数，0为完全透明，1为完全不透明）
+        alpha = self.params['darkness']
 
-            # 计算透明度（基于darkness参数，0为完全透明，1为完全不透明）
-            alpha = self.params['darkness']
+        for (x, y), size in zip(centers, sizes):
+            # 污点的外接矩形（裁剪到图像范围内）
+            x0, x1 = max(0, x - size), min(w, x + size + 1)
+            y0, y1 = max(0, y - size), min(h, y + size + 1)
+            roi = result[y0:y1, x0:x1]
 
             # 绘制带透明度的彩色污点
-            overlay = result.copy()  # 创建叠加层
-            cv2.circle(overlay, (x, y), size, spot_color, -1)  # 绘制实心圆
-            # 融合叠加层与原图（实现半透明效果）
-            cv2.addWeighted(overlay, alpha, result, 1 - alpha, 0, result)
+            overlay = roi.copy()  # 创建叠加层（仅外接矩形）
+            cv2.circle(overlay, (x - x0, y - y0), size, spot_color, -1)  # 绘制实心圆
+            # 融合叠加层与原图（实现半透明效果，重叠的污点依次叠加）
+            roi[...] = cv2.addWeighted(overlay, alpha, roi, 1 - alpha, 0)
 
-        return result
\ No newline at end of file
+        return result
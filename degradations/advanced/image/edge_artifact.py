@@ -2,6 +2,36 @@ import cv2
 import numpy as np
 from core.base_degradation import BaseDegradation
 
+# 可选依赖：Numba（把边缘伪影的逐像素运算融合为一个并行内核，未安装时使用NumPy）
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+# 亮度差达到该值时边缘权重取满（取代Canny的0/1边缘掩码）
+EDGE_RESPONSE_FULL = 32.0
+
+if njit is not None:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _fuse_edge_artifact(data, gray, gray_blurred, strength, out):
+        """按亮度的反锐化差值生成边缘伪影，每个像素只读写一次
+
+        d = gray - gray_blurred，权重 = strength * min(1, |d| / EDGE_RESPONSE_FULL)，
+        out = clip(data + d * 权重, 0, 255)
+        """
+        height, width, channels = data.shape
+        for i in prange(height):
+            for j in range(width):
+                diff = gray[i, j] - gray_blurred[i, j]
+                if diff == 0:
+                    for c in range(channels):
+                        out[i, j, c] = data[i, j, c]
+                    continue
+                artifact = diff * strength * min(1.0, abs(diff) / EDGE_RESPONSE_FULL)
+                for c in range(channels):
+                    value = data[i, j, c] + artifact
+                    out[i, j, c] = np.uint8(min(255.0, max(0.0, value)))
+
 
 class EdgeArtifactDegradation(BaseDegradation):
     """边缘伪影退化（图像专属）"""
@@ -24,6 +54,9 @@ class EdgeArtifactDegradation(BaseDegradation):
             kernel_size += 1  # 偶数自动转为奇数
         self.params['kernel_size'] = kernel_size
 
+        # 预先生成一维高斯核，模糊按行、列两次一维卷积完成
+        self._blur_kernel = cv2.getGaussianKernel(kernel_size, 1.5, cv2.CV_32F)
+
     def apply(self, data: np.ndarray) -> np.ndarray:
         """
         应用边缘伪影效果（支持自定义核大小）
@@ -35,22 +68,27 @@ class EdgeArtifactDegradation(BaseDegradation):
             带边缘伪影的图像
         """
         strength = self.params['strength']
-        kernel_size = self.params['kernel_size']
-
-        # 转换为灰度图进行边缘检测
-        gray = cv2.cvtColor(data, cv2.COLOR_RGB2GRAY)
-        edges = cv2.Canny(gray, 50, 150).astype(np.float32) / 255.0
-        edges = np.expand_dims(edges, axis=2)  # 扩展维度以匹配RGB图像
-
-        # 使用指定大小的核进行高斯模糊（影响边缘伪影的范围）
-        blurred = cv2.GaussianBlur(
-            data.astype(np.float32),
-            (kernel_size, kernel_size),  # 使用自定义核大小
-            sigmaX=1.5  # 固定sigma值，或可改为参数控制
-        )
-
-        # 生成边缘增强效果
-        artifact = (data.astype(np.float32) - blurred) * strength * edges
-        result = data.astype(np.float32) + artifact
+        # 强度为0时没有伪影，直接返回输入（不复制）
+        if strength == 0.0 and data.dtype == np.uint8:
+            return data
+
+        # 只在亮度通道上做反锐化：边缘处亮度与其模糊结果的差值既是伪影本身，也决定伪影强度
+        # 亮度及其模糊结果只是中间量，使用复用的float32工作缓冲区
+        gray_u8 = self._scratch_buffer('gray_u8', data.shape[:2], np.uint8)
+        cv2.cvtColor(data, cv2.COLOR_RGB2GRAY, dst=gray_u8)
+        gray = self._scratch_buffer('gray', data.shape[:2])
+        np.copyto(gray, gray_u8, casting='unsafe')
+        gray_blurred = self._scratch_buffer('gray_blurred', data.shape[:2])
+        cv2.sepFilter2D(gray, -1, self._blur_kernel, self._blur_kernel, dst=gray_blurred)
+
+        # 生成边缘增强效果：Numba可用时在一个内核中完成，直接写出uint8
+        if njit is not None and data.dtype == np.uint8:
+            result = np.empty_like(data)
+            _fuse_edge_artifact(data, gray, gray_blurred, strength, result)
+            return result
+
+        diff = gray - gray_blurred
+        artifact = diff * strength * np.minimum(1.0, np.abs(diff) / EDGE_RESPONSE_FULL)
+        result = data.astype(np.float32) + artifact[..., np.newaxis]
 
         return np.clip(result, 0, 255).astype(np.uint8)
@@ -1,16 +1,44 @@
+import cv2
 import numpy as np
 from core.base_degradation import BaseDegradation
 
+# 可选依赖：Numba（拷贝与选定行查表合并为一次按行并行的遍历，未安装时使用cv2.LUT）
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+if njit is not None:
+    @njit(parallel=True, cache=True)
+    def _interlace_rows(data, start_row, lut, out):
+        """与start_row同奇偶的行经lut衰减，其余行原样拷贝，每个像素只读写一次
+
+        data/out为按行展平的 (H, W*3) uint8数组
+        """
+        height, row_size = data.shape
+        for i in prange(height):
+            if i % 2 == start_row:
+                for j in range(row_size):
+                    out[i, j] = lut[data[i, j]]
+            else:
+                out[i, :] = data[i, :]
+
 
 class InterlaceDegradation(BaseDegradation):
     """隔行扫描效应退化（图像专属）"""
     allowed_params = ['intensity']
+    supports_inplace = True  # 逐行缩放，可被管道融合
 
     def validate_params(self):
         """验证并处理参数"""
         intensity = self.params.get('intensity', 0.5)
         self.params['intensity'] = np.clip(intensity, 0, 1)
 
+        # uint8查找表：与float32缓冲区上的衰减+截断结果一致，apply直接在uint8上查表
+        scaled = np.arange(256, dtype=np.float32)
+        scaled *= (1 - self.params['intensity'])
+        self._row_lut = np.clip(scaled, 0, 255).astype(np.uint8)
+
     def apply(self, data: np.ndarray) -> np.ndarray:
         """
         应用隔行扫描效果
@@ -21,14 +49,40 @@ class InterlaceDegradation(BaseDegradation):
         Returns:
             带隔行扫描效果的图像
         """
+        # 衰减为0时图像不变，直接返回输入（不复制）
+        if self.params['intensity'] == 0 and data.dtype == np.uint8:
+            return data
+
+        if data.dtype != np.uint8:
+            result = self._scratch_buffer('frame', data.shape)
+            np.copyto(result, data, casting='unsafe')
+            self.apply_inplace(result)
+            return result.astype(np.uint8)
+
+        # 随机选择奇偶行进行亮度衰减（uint8查表，无需转换为float32）
+        keep_odd = np.random.random() > 0.5
+        start_row = 1 if keep_odd else 0
+
+        if njit is not None and data.ndim == 3 and data.flags.c_contiguous:
+            result = np.empty_like(data)
+            height = data.shape[0]
+            _interlace_rows(data.reshape(height, -1), start_row, self._row_lut,
+                            result.reshape(height, -1))
+            return result
+
+        result = data.copy()
+        result[start_row::2] = cv2.LUT(result[start_row::2], self._row_lut)
+        return result
+
+    def apply_inplace(self, out: np.ndarray) -> None:
+        """在float32缓冲区上原地应用隔行扫描效果，结果裁剪到[0, 255]"""
         intensity = self.params['intensity']
-        result = data.astype(np.float32)
 
         # 随机选择奇偶行进行亮度衰减
         keep_odd = np.random.random() > 0.5
         start_row = 1 if keep_odd else 0
 
         # 对选定行应用衰减
-        result[start_row::2] *= (1 - intensity)
+        out[start_row::2] *= (1 - intensity)
 
-        return np.clip(result, 0, 255).astype(np.uint8)
+        np.clip(out, 0, 255, out=out)
@@ -6,7 +6,7 @@ from core.base_degradation import BaseDegradation
 class ScratchDegradation(BaseDegradation):
     """划痕退化（图像/视频通用）"""
     # 新增 brightness 到允许的参数列表，解决参数不支持错误
-    allowed_params = ['num_scratches', 'width_range', 'intensity', 'line_width', 'brightness']
+    allowed_params = ['num_scratches', 'width_range', 'intensity', 'line_width', 'brightness', 'seed']
 
     def validate_params(self):
         # 1. 验证划痕数量（非负整数）
@@ -40,40 +40,46 @@ class ScratchDegradation(BaseDegradation):
             # 自动计算默认亮度（与intensity关联）
             self.params['brightness'] = int(255 * self.params['intensity'])
 
+        # 5. 随机种子（可选）：实例持有独立的随机数生成器，指定种子时结果可复现
+        seed = self.params.get('seed')
+        if seed is not None:
+            seed = int(seed)
+            self.params['seed'] = seed
+            self.stateful = True  # 随机序列依赖帧的处理顺序，需要按帧串行
+        self._rng = np.random.default_rng(seed)
+
     def apply(self, data: np.ndarray) -> np.ndarray:
+        # 没有划痕时图像不变，直接返回输入（不复制）
+        if self.params['num_scratches'] == 0:
+            return data
+
         result = data.copy()
         h, w = result.shape[:2]
+        num_scratches = self.params['num_scratches']
         # 获取划痕颜色（使用brightness参数，支持彩色和灰度图）
         color_value = self.params['brightness']
 
-        # 生成多个划痕
-        for _ in range(self.params['num_scratches']):
-            # 随机起点和终点（确保在图像范围内）
-            x1, y1 = np.random.randint(0, w), np.random.randint(0, h)
-            x2, y2 = np.random.randint(0, w), np.random.randint(0, h)
+        # 根据图像通道数设置颜色（彩色图为三通道，灰度图为单通道）
+        if len(result.shape) == 3 and result.shape[2] == 3:  # 彩色图
+            color = (color_value, color_value, color_value)
+        else:  # 灰度图
+            color = color_value
 
-            # 确定线宽
-            if self.params['line_width'] > 0:
-                line_width = self.params['line_width']
-            else:
-                line_width = np.random.randint(
-                    self.params['width_range'][0],
-                    self.params['width_range'][1] + 1
-                )
+        # 一次性生成所有划痕的起点和终点（确保在图像范围内），tolist()转为Python int供cv2直接使用
+        points = self._rng.integers(0, [w, h, w, h], size=(num_scratches, 4)).tolist()
 
-            # 根据图像通道数设置颜色（彩色图为三通道，灰度图为单通道）
-            if len(result.shape) == 3 and result.shape[2] == 3:  # 彩色图
-                color = (color_value, color_value, color_value)
-            else:  # 灰度图
-                color = color_value
+        # 确定线宽
+        if self.params['line_width'] > 0:
+            line_widths = [self.params['line_width']] * num_scratches
+        else:
+            line_widths = self._rng.integers(
+                self.params['width_range'][0],
+                self.params['width_range'][1] + 1,
+                num_scratches
+            ).tolist()
 
-            # 绘制划痕
-            cv2.line(
-                img=result,
-                pt1=(x1, y1),
-                pt2=(x2, y2),
-                color=color,
-                thickness=line_width
-            )
+        # 绘制划痕
+        for (x1, y1, x2, y2), line_width in zip(points, line_widths):
+            cv2.line(result, (x1, y1), (x2, y2), color, line_width)
 
         return result
@@ -1,3 +1,4 @@
+import cv2
 import numpy as np
 from core.base_degradation import BaseDegradation
 
@@ -6,6 +7,7 @@ class FlickerDegradation(BaseDegradation):
     """闪烁效应退化（支持幅度、频率、强度多参数控制）"""
     # 新增 amplitude 到允许的参数列表
     allowed_params = ['range', 'intensity', 'frequency', 'amplitude']
+    stateful = True  # frame_counter依赖帧顺序
 
     def __init__(self, params: dict = None):
         super().__init__(params)
@@ -63,12 +65,26 @@ class FlickerDegradation(BaseDegradation):
         x2 = np.random.randint(w - margin_x, w)
         y2 = np.random.randint(h - margin_y, h)
 
-        # 应用闪烁效果
-        result = data.astype(np.float32)
-        if should_flicker:
-            factor = np.random.uniform(adjusted_min, adjusted_max)
-            result[y1:y2, x1:x2] *= factor
-
         # 帧计数递增
         self.frame_counter += 1
-        return np.clip(result, 0, 255).astype(np.uint8)
\ No newline at end of file
+
+        if data.dtype != np.uint8:
+            result = data.astype(np.float32)
+            if should_flicker:
+                factor = np.random.uniform(adjusted_min, adjusted_max)
+                result[y1:y2, x1:x2] *= factor
+            return np.clip(result, 0, 255).astype(np.uint8)
+
+        # 不闪烁的帧保持原样，直接返回输入（不复制、不做float转换）
+        if not should_flicker:
+            return data
+
+        # 亮度缩放只有256种输入，构建uint8查找表后对闪烁区域查表（与float32乘法+截断的结果一致）
+        factor = np.random.uniform(adjusted_min, adjusted_max)
+        lut = np.arange(256, dtype=np.float32)
+        lut *= factor
+        lut = np.clip(lut, 0, 255).astype(np.uint8)
+
+        result = data.copy()
+        result[y1:y2, x1:x2] = cv2.LUT(result[y1:y2, x1:x2], lut)
+        return result
@@ -3,6 +3,9 @@ import numpy as np
 import math
 from core.base_degradation import BaseDegradation
 
+# filter2D在核尺寸超过该值时改用DFT卷积，对只有一条线段的稀疏核反而更慢
+DIRECT_FILTER_MAX_KSIZE = 11
+
 
 class MotionBlurDegradation(BaseDegradation):
     """运动模糊退化（仅适用于视频）"""
@@ -19,6 +22,25 @@ class MotionBlurDegradation(BaseDegradation):
         angle = self.params.get('angle', 0)
         self.params['angle'] = angle % 360
 
+        # 参数固定后核也固定，只生成一次，逐帧处理时直接复用
+        self._kernel = self._build_kernel(self.params['kernel_size'], self.params['angle'])
+
+        # 水平/竖直方向的运动模糊是一维均值滤波，改用盒式滤波（每像素ks次而非ks*ks次乘加）
+        ks = self.params['kernel_size']
+        if self.params['angle'] % 180 == 0:
+            self._box_size = (ks, 1)
+        elif self.params['angle'] % 180 == 90:
+            self._box_size = (1, ks)
+        else:
+            self._box_size = None
+
+        # 斜向大核：线段上的采样点（行、列偏移），逐帧按平移求和代替稠密卷积
+        self._taps = None
+        if self._box_size is None and ks > DIRECT_FILTER_MAX_KSIZE:
+            taps = np.argwhere(self._kernel).tolist()
+            if len(taps) * 255 <= np.iinfo(np.uint16).max:  # uint16累加不会溢出
+                self._taps = taps
+
     def apply(self, data: np.ndarray) -> np.ndarray:
         """应用运动模糊
 
@@ -28,25 +50,56 @@ class MotionBlurDegradation(BaseDegradation):
         Returns:
             运动模糊后的视频帧
         """
-        kernel_size = self.params['kernel_size']
-        angle = self.params['angle']
+        if self._box_size is not None:
+            # 与filter2D使用同一条线段核的结果逐像素一致
+            return cv2.blur(data, self._box_size)
+        if self._taps is not None and data.dtype == np.uint8:
+            return self._apply_taps(data)
+        return cv2.filter2D(data, -1, self._kernel)
+
+    def _apply_taps(self, data: np.ndarray) -> np.ndarray:
+        """斜向运动模糊：对线段上每个采样点的平移图像求和再取均值（每像素len(taps)次加法）
 
-        # 生成运动模糊核
+        边界与filter2D默认的BORDER_REFLECT_101一致；结果为精确均值（就近舍入，恰为.5时取偶），
+        与filter2D的DFT路径最多相差1
+        """
+        h, w = data.shape[:2]
+        center = self.params['kernel_size'] // 2
+        padded = cv2.copyMakeBorder(data, center, center, center, center, cv2.BORDER_REFLECT_101)
+
+        acc = self._scratch_buffer('taps_sum', data.shape, np.uint16)
+        acc[...] = 0
+        for y, x in self._taps:
+            cv2.add(acc, padded[y:y + h, x:x + w], dst=acc, dtype=cv2.CV_16U)
+        return cv2.multiply(acc, 1.0 / len(self._taps), dtype=cv2.CV_8U)
+
+    @staticmethod
+    def _build_kernel(kernel_size: int, angle: float) -> np.ndarray:
+        """生成归一化的运动模糊核：沿角度方向的一条线段（一次性计算所有采样点的坐标）"""
         kernel = np.zeros((kernel_size, kernel_size), dtype=np.float32)
         center = kernel_size // 2
-        angle_rad = math.radians(angle)
 
+        # 水平/竖直方向：线段就是中间一行/一列，无需三角函数
+        if angle % 180 == 0:
+            kernel[center, :] = 1.0 / kernel_size
+            return kernel
+        if angle % 180 == 90:
+            kernel[:, center] = 1.0 / kernel_size
+            return kernel
+
+        angle_rad = math.radians(angle)
         length = kernel_size // 2
-        for i in range(-length, length + 1):
-            x = int(center + i * math.cos(angle_rad))
-            y = int(center + i * math.sin(angle_rad))
-            if 0 <= x < kernel_size and 0 <= y < kernel_size:
-                kernel[y, x] = 1
+        steps = np.arange(-length, length + 1)
+        # astype向零截断，与int()一致
+        xs = (center + steps * math.cos(angle_rad)).astype(np.intp)
+        ys = (center + steps * math.sin(angle_rad)).astype(np.intp)
+        inside = (xs >= 0) & (xs < kernel_size) & (ys >= 0) & (ys < kernel_size)
+        kernel[ys[inside], xs[inside]] = 1
 
         # 避免全零核
-        if np.sum(kernel) == 0:
+        total = np.sum(kernel)
+        if total == 0:
             kernel[center, center] = 1
         else:
-            kernel /= np.sum(kernel)
-
-        return cv2.filter2D(data, -1, kernel)
+            kernel /= total
+        return kernel
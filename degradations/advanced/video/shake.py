@@ -7,6 +7,7 @@ class ShakeDegradation(BaseDegradation):
     """抖动重影退化（支持位移、频率控制，适用于图像和视频）"""
     # 新增 displacement 参数到允许的列表
     allowed_params = ['max_offset', 'mix_weight', 'frequency', 'displacement']
+    stateful = True  # frame_counter依赖帧顺序
 
     def __init__(self, params: dict = None):
         super().__init__(params)
@@ -55,7 +56,6 @@ class ShakeDegradation(BaseDegradation):
         displacement = self.params['displacement']
         mix_weight = self.params['mix_weight']
         frequency = self.params['frequency']
-        h, w = data.shape[:2]
 
         # 频率控制逻辑
         should_jitter = True
@@ -71,14 +71,8 @@ class ShakeDegradation(BaseDegradation):
         dx = np.random.randint(-displacement, displacement + 1)
         dy = np.random.randint(-displacement, displacement + 1)
 
-        # 应用位移变换
-        transform_matrix = np.float32([[1, 0, dx], [0, 1, dy]])
-        jittered = cv2.warpAffine(
-            data,
-            transform_matrix,
-            (w, h),
-            borderMode=cv2.BORDER_WRAP
-        )
+        # 应用位移变换：整数平移加环绕边界就是循环移位（与warpAffine + BORDER_WRAP结果一致，无需插值）
+        jittered = np.roll(data, shift=(dy, dx), axis=(0, 1))
 
         # 混合原图和位移图
         result = cv2.addWeighted(
@@ -1,7 +1,23 @@
 import cv2
 import numpy as np
+import logging
 from core.base_degradation import BaseDegradation
 
+logger = logging.getLogger(__name__)
+
+
+def _check_opencv_optimizations() -> None:
+    """检查OpenCV的优化实现是否可用（高斯/均值模糊的耗时几乎全部在OpenCV内部的SIMD/IPP路径上）"""
+    if not cv2.useOptimized():
+        logger.warning("OpenCV未启用优化代码路径（cv2.useOptimized()为False），模糊处理会明显变慢")
+    ipp = getattr(cv2, 'ipp', None)
+    if ipp is None or not ipp.useIPP():
+        # 非x86平台的OpenCV通常不带IPP，仅作提示
+        logger.info("当前OpenCV未启用Intel IPP，模糊处理使用OpenCV自带的SIMD实现")
+
+
+_check_opencv_optimizations()
+
 
 class BlurDegradation(BaseDegradation):
     """模糊退化（支持高斯模糊和均值模糊）"""
@@ -11,9 +27,9 @@ class BlurDegradation(BaseDegradation):
         # 设置默认模糊类型
         if 'blur_type' not in self.params:
             self.params['blur_type'] = '高斯模糊'
-            print(f"未指定模糊类型，默认使用: {self.params['blur_type']}")
+            logger.debug("未指定模糊类型，默认使用: %s", self.params['blur_type'])
         else:
-            print(f"指定的模糊类型: {self.params['blur_type']}")
+            logger.debug("指定的模糊类型: %s", self.params['blur_type'])
 
         # 确保核大小为奇数且为正数
         if 'kernel_size' in self.params:
@@ -22,37 +38,37 @@ class BlurDegradation(BaseDegradation):
             ks = ks if ks % 2 == 1 else ks + 1
             self.params['kernel_size'] = ks
             if original_ks != ks:
-                print(f"核大小调整: 从 {original_ks} 调整为 {ks} (确保为正奇数)")
+                logger.debug("核大小调整: 从 %s 调整为 %s (确保为正奇数)", original_ks, ks)
             else:
-                print(f"使用的核大小: {ks}x{ks}")
+                logger.debug("使用的核大小: %sx%s", ks, ks)
         else:
             self.params['kernel_size'] = 5  # 默认核大小
-            print(f"未指定核大小，默认使用: {self.params['kernel_size']}x{self.params['kernel_size']}")
+            logger.debug("未指定核大小，默认使用: %sx%s", self.params['kernel_size'], self.params['kernel_size'])
 
         # 确保sigma为正数（仅用于高斯模糊）
         if self.params['blur_type'] == '高斯模糊':
             original_sigma = self.params.get('sigma', 1.0)
             self.params['sigma'] = max(0.1, original_sigma)
             if original_sigma != self.params['sigma']:
-                print(f"标准差调整: 从 {original_sigma} 调整为 {self.params['sigma']} (确保为正数)")
+                logger.debug("标准差调整: 从 %s 调整为 %s (确保为正数)", original_sigma, self.params['sigma'])
             else:
-                print(f"使用的标准差(sigma): {self.params['sigma']}")
+                logger.debug("使用的标准差(sigma): %s", self.params['sigma'])
 
     def apply(self, data: np.ndarray) -> np.ndarray:
         blur_type = self.params['blur_type']
         kernel_size = self.params['kernel_size']
-        print("\n开始进行模糊处理...")
 
         try:
             if blur_type == '高斯模糊':
-                print(f"正在应用{blur_type}，核大小: {kernel_size}x{kernel_size}，标准差: {self.params['sigma']}")
+                logger.debug("正在应用%s，核大小: %dx%d，标准差: %s",
+                             blur_type, kernel_size, kernel_size, self.params['sigma'])
                 result = cv2.GaussianBlur(
                     data,
                     (kernel_size, kernel_size),
                     self.params['sigma']
                 )
             elif blur_type == '均值模糊':
-                print(f"正在应用{blur_type}，核大小: {kernel_size}x{kernel_size}")
+                logger.debug("正在应用%s，核大小: %dx%d", blur_type, kernel_size, kernel_size)
                 result = cv2.blur(
                     data,
                     (kernel_size, kernel_size)
@@ -60,15 +76,14 @@ class BlurDegradation(BaseDegradation):
             else:
                 # 默认使用高斯模糊
                 sigma = self.params.get('sigma', 1.0)
-                print(
-                    f"模糊类型'{blur_type}'不支持，默认使用高斯模糊，核大小: {kernel_size}x{kernel_size}，标准差: {sigma}")
+                logger.debug("模糊类型'%s'不支持，默认使用高斯模糊，核大小: %dx%d，标准差: %s",
+                             blur_type, kernel_size, kernel_size, sigma)
                 result = cv2.GaussianBlur(
                     data,
                     (kernel_size, kernel_size),
                     sigma
                 )
-            print("模糊处理完成！")
             return result
         except Exception as e:
-            print(f"处理过程中发生错误: {str(e)}")
+            logger.error(f"模糊处理过程中发生错误: {str(e)}")
             raise  # 重新抛出异常，让调用者处理
@@ -1,8 +1,7 @@
 import cv2
 import numpy as np
-import os
 import subprocess
-import tempfile
+import threading
 from core.base_degradation import BaseDegradation
 
 
@@ -105,7 +104,10 @@ class CompressionDegradation(BaseDegradation):
         if len(data.shape) not in (2, 3):
             raise ValueError(f"图像压缩需要2维或3维输入，实际输入: {data.shape}")
 
-        frame_bgr = cv2.cvtColor(data, cv2.COLOR_RGB2BGR) if len(data.shape) == 3 else data
+        # 有损格式（JPEG/WebP）按BGR顺序做YCbCr转换，通道顺序会影响结果，必须先转为BGR；
+        # PNG无损，通道只是原样存取，直接编码RGB即可省去两次cvtColor（结果完全一致）
+        swap_channels = len(data.shape) == 3 and fmt != 'png'
+        frame_bgr = cv2.cvtColor(data, cv2.COLOR_RGB2BGR) if swap_channels else data
         encode_param = [format_info['encode_param'], self.params['quality']]
 
         try:
@@ -113,7 +115,7 @@ class CompressionDegradation(BaseDegradation):
             if not _:
                 raise RuntimeError(f"图像编码失败: {fmt}")
             decoded = cv2.imdecode(encoded, cv2.IMREAD_COLOR if len(data.shape) == 3 else cv2.IMREAD_GRAYSCALE)
-            return cv2.cvtColor(decoded, cv2.COLOR_BGR2RGB) if len(decoded.shape) == 3 else decoded
+            return cv2.cvtColor(decoded, cv2.COLOR_BGR2RGB) if swap_channels else decoded
         except Exception as e:
             raise RuntimeError(f"图像压缩失败: {str(e)}") from e
 
@@ -148,7 +150,11 @@ class CompressionDegradation(BaseDegradation):
         raise RuntimeError(f"所有编解码器都失败了。尝试的编解码器: {codecs_to_try}")
 
     def _apply_video_compression(self, data: np.ndarray, fmt: str, format_info: dict) -> np.ndarray:
-        """使用FFmpeg处理视频压缩，确保浏览器兼容性"""
+        """使用FFmpeg处理视频压缩，确保浏览器兼容性
+
+        原始RGB帧经管道送入FFmpeg编码为H.264，再由第二个FFmpeg进程解码回RGB，
+        全程不落地临时文件，也不再经过一次额外的mp4v编解码
+        """
         # 适配单帧/批量输入
         is_single_frame = False
         original_shape = data.shape
@@ -166,58 +172,23 @@ class CompressionDegradation(BaseDegradation):
         quality = self.params['quality']
         bitrate = self.params.get('bitrate', 1000)
 
-        # 创建临时文件
-        with tempfile.NamedTemporaryFile(suffix='.mp4', delete=False) as temp_input:
-            temp_input_path = temp_input.name
-        with tempfile.NamedTemporaryFile(suffix='.mp4', delete=False) as temp_output:
-            temp_output_path = temp_output.name
-
         try:
-            # 1. 先用OpenCV创建临时视频文件
-            fourcc = cv2.VideoWriter_fourcc(*'mp4v')  # 使用基础编码创建临时文件
-            out = cv2.VideoWriter(temp_input_path, fourcc, fps, (w, h), True)
-
-            if not out.isOpened():
-                raise RuntimeError("无法创建临时视频文件")
-
-            # 写入所有帧
-            for frame in data:
-                frame_bgr = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
-                out.write(frame_bgr)
-            out.release()
-
-            # 2. 使用FFmpeg重新编码为浏览器兼容格式
-            self._compress_with_ffmpeg(temp_input_path, temp_output_path, quality, bitrate, fps)
-
-            # 3. 读取FFmpeg处理后的视频
-            cap = cv2.VideoCapture(temp_output_path)
-            if not cap.isOpened():
-                raise RuntimeError(f"无法读取FFmpeg处理后的视频文件")
-
-            # 验证视频属性
-            frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-            video_fps = cap.get(cv2.CAP_PROP_FPS)
-            print(f"FFmpeg压缩后视频信息: {frame_count}帧, {video_fps}fps")
-
-            compressed_frames = []
-            while cap.isOpened():
-                ret, frame = cap.read()
-                if not ret:
-                    break
-                compressed_frames.append(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
-            cap.release()
+            # 解码结果直接读入预分配的数组
+            result = np.empty((n_frames, h, w, 3), dtype=np.uint8)
+            received = self._compress_with_ffmpeg(
+                np.ascontiguousarray(data, dtype=np.uint8), result, quality, bitrate, fps
+            )
 
-            if not compressed_frames:
+            decoded_frames = received // (h * w * 3)
+            print(f"FFmpeg压缩后视频信息: {decoded_frames}帧, {fps}fps")
+            if decoded_frames == 0:
                 raise RuntimeError("FFmpeg压缩后的视频没有有效帧")
 
-            # 确保帧数量一致
-            if len(compressed_frames) < n_frames:
-                compressed_frames.extend([compressed_frames[-1]] * (n_frames - len(compressed_frames)))
-            else:
-                compressed_frames = compressed_frames[:n_frames]
+            # 确保帧数量一致（解码帧不足时用最后一帧补齐，多出的帧在读取时已丢弃）
+            if decoded_frames < n_frames:
+                result[decoded_frames:] = result[decoded_frames - 1]
 
             # 恢复单帧维度
-            result = np.array(compressed_frames)
             if is_single_frame:
                 result = np.squeeze(result, axis=0)
 
@@ -225,49 +196,101 @@ class CompressionDegradation(BaseDegradation):
 
         except Exception as e:
             raise RuntimeError(f"视频压缩失败: {str(e)}") from e
-        finally:
-            # 清理临时文件
-            for temp_file in [temp_input_path, temp_output_path]:
-                if os.path.exists(temp_file):
-                    try:
-                        os.remove(temp_file)
-                    except Exception as e:
-                        print(f"临时文件清理失败: {str(e)}")
-
-    def _compress_with_ffmpeg(self, input_path, output_path, quality, bitrate, fps):
-        """使用FFmpeg进行视频压缩，确保浏览器兼容性"""
+
+    def _compress_with_ffmpeg(self, frames: np.ndarray, out: np.ndarray, quality, bitrate, fps) -> int:
+        """使用FFmpeg进行视频压缩，确保浏览器兼容性
+
+        Args:
+            frames: 连续存储的uint8帧 (N, H, W, 3)，RGB
+            out: 接收解码帧的uint8数组，与frames形状相同
+            quality: CRF质量参数
+            bitrate: 最大比特率（kbps）
+            fps: 帧率
+
+        Returns:
+            写入out的字节数
+        """
+        n_frames, h, w, _ = frames.shape
+
+        # 编码：原始RGB帧 -> H.264裸流（针对浏览器优化的参数）
+        encode_cmd = [
+            'ffmpeg', '-y', '-loglevel', 'error',
+            '-f', 'rawvideo', '-pix_fmt', 'rgb24',  # 输入为原始RGB帧
+            '-s', f'{w}x{h}', '-r', str(fps),
+            '-i', 'pipe:0',
+            '-c:v', 'libx264',  # H.264编码器
+            '-profile:v', 'baseline',  # 基准档次，最大兼容性
+            '-level', '3.1',  # 兼容移动设备
+            '-pix_fmt', 'yuv420p',  # 标准像素格式
+            '-crf', str(min(max(quality, 18), 28)),  # 质量控制(18-28)
+            '-maxrate', f'{bitrate}k',  # 最大比特率
+            '-bufsize', f'{bitrate * 2}k',  # 缓冲区大小
+            '-preset', 'medium',  # 编码速度vs质量平衡
+            '-f', 'h264', 'pipe:1'
+        ]
+        # 解码：H.264裸流 -> 原始RGB帧
+        decode_cmd = [
+            'ffmpeg', '-loglevel', 'error',
+            '-f', 'h264', '-i', 'pipe:0',
+            '-f', 'rawvideo', '-pix_fmt', 'rgb24', 'pipe:1'
+        ]
+
         try:
-            # 构建FFmpeg命令 - 针对浏览器优化
-            cmd = [
-                'ffmpeg', '-y',  # 覆盖输出文件
-                '-i', input_path,  # 输入文件
-                '-c:v', 'libx264',  # H.264编码器
-                '-profile:v', 'baseline',  # 基准档次，最大兼容性
-                '-level', '3.1',  # 兼容移动设备
-                '-pix_fmt', 'yuv420p',  # 标准像素格式
-                '-crf', str(min(max(quality, 18), 28)),  # 质量控制(18-28)
-                '-maxrate', f'{bitrate}k',  # 最大比特率
-                '-bufsize', f'{bitrate * 2}k',  # 缓冲区大小
-                '-movflags', '+faststart',  # 优化网络播放
-                '-r', str(fps),  # 帧率
-                '-preset', 'medium',  # 编码速度vs质量平衡
-                output_path
-            ]
-
-            # 执行FFmpeg命令
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                check=True,
-                timeout=300  # 5分钟超时
-            )
+            encoder = subprocess.Popen(encode_cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                       stderr=subprocess.PIPE)
+            try:
+                decoder = subprocess.Popen(decode_cmd, stdin=encoder.stdout, stdout=subprocess.PIPE,
+                                           stderr=subprocess.PIPE)
+            except Exception:
+                encoder.kill()
+                encoder.wait()
+                raise
+        except FileNotFoundError:
+            raise RuntimeError("找不到FFmpeg，请确保FFmpeg已正确安装并添加到系统PATH中")
+        # 编码器的输出只由解码器读取
+        encoder.stdout.close()
+
+        def _feed() -> None:
+            # 后台线程写入原始帧，与主线程读取解码结果同时进行，避免两端管道互相阻塞
+            try:
+                encoder.stdin.write(memoryview(frames).cast('B'))
+            except (BrokenPipeError, OSError):
+                pass  # 编码器提前退出，错误由返回码报告
+            finally:
+                try:
+                    encoder.stdin.close()
+                except OSError:
+                    pass
+
+        feeder = threading.Thread(target=_feed, name="ffmpeg-feed", daemon=True)
+        feeder.start()
 
-            print(f"FFmpeg压缩成功: CRF={quality}, 比特率={bitrate}k")
+        try:
+            target = memoryview(out).cast('B')
+            received = 0
+            while received < len(target):
+                n = decoder.stdout.readinto(target[received:])
+                if not n:
+                    break
+                received += n
+            decoder.stdout.read()  # 丢弃超出输入帧数的部分，让解码器正常结束
 
+            feeder.join(timeout=300)
+            encoder.wait(timeout=300)  # 5分钟超时
+            decoder.wait(timeout=300)
         except subprocess.TimeoutExpired:
             raise RuntimeError("FFmpeg处理超时")
-        except subprocess.CalledProcessError as e:
-            raise RuntimeError(f"FFmpeg处理失败: {e.stderr}")
-        except FileNotFoundError:
-            raise RuntimeError("找不到FFmpeg，请确保FFmpeg已正确安装并添加到系统PATH中")
\ No newline at end of file
+        finally:
+            for proc in (encoder, decoder):
+                if proc.poll() is None:
+                    proc.kill()
+                    proc.wait()
+
+        for proc in (encoder, decoder):
+            if proc.returncode != 0:
+                raise RuntimeError(f"FFmpeg处理失败: {proc.stderr.read().decode(errors='replace')}")
+        encoder.stderr.close()
+        decoder.stderr.close()
+
+        print(f"FFmpeg压缩成功: CRF={quality}, 比特率={bitrate}k")
+        return received
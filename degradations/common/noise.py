@@ -1,7 +1,7 @@
+import cv2
 import numpy as np
 from core.base_degradation import BaseDegradation
 
-
 class NoiseDegradation(BaseDegradation):
     """
     噪声退化处理类（适用于图像和视频帧）
@@ -9,6 +9,7 @@ class NoiseDegradation(BaseDegradation):
     """
     # 允许的参数列表
     allowed_params = ['noise_type', 'intensity', 'density', 'salt_pepper_ratio']
+    supports_inplace = True  # 逐像素运算，可被管道融合
 
     def validate_params(self):
         """验证并标准化输入参数，确保参数符合各噪声类型的要求"""
@@ -60,6 +61,9 @@ class NoiseDegradation(BaseDegradation):
             self.params.pop('density', None)
             self.params.pop('salt_pepper_ratio', None)
 
+        # 泊松采样使用PCG64生成器（比np.random的旧式MT19937快约1/5）
+        self._rng = np.random.default_rng()
+
     def apply(self, data: np.ndarray) -> np.ndarray:
         """
         向图像/视频帧添加噪声
@@ -70,56 +74,104 @@ class NoiseDegradation(BaseDegradation):
         返回:
             添加噪声后的图像/视频帧，形状和 dtype 与输入一致
         """
-        # 确保输入格式正确
-        if len(data.shape) != 3 or data.shape[2] != 3:
-            raise ValueError(f"输入数据必须是RGB格式的图像 (H, W, 3)，当前形状: {data.shape}")
+        # 椒盐噪声只写入常量值，直接在uint8副本上撒点（无需float32转换和裁剪，结果一致）
+        if self.params['noise_type'] == "椒盐噪声" and data.dtype == np.uint8:
+            self._check_rgb(data)
+            out = data.copy()
+            self._add_salt_pepper(out)
+            return out
+
+        # 高斯噪声：OpenCV在复用的缓冲区中生成噪声，饱和加法直接输出uint8（四舍五入）
+        if self.params['noise_type'] == "高斯噪声" and data.dtype == np.uint8 and data.ndim == 3:
+            self._check_rgb(data)
+            return cv2.add(data, self._gaussian_noise(data.shape), dtype=cv2.CV_8U)
+
+        frame = self._scratch_buffer('frame', data.shape)  # 转为float32以避免计算溢出
+        np.copyto(frame, data, casting='unsafe')
+        self.apply_inplace(frame)
+        return frame.astype(np.uint8)
+
+    def apply_inplace(self, out: np.ndarray) -> None:
+        """
+        在float32缓冲区上原地添加噪声，结果裁剪到[0, 255]
+
+        参数:
+            out: float32类型的RGB图像或视频帧，形状为 (H, W, 3)
+        """
+        self._check_rgb(out)
 
         noise_type = self.params['noise_type']
-        frame = data.astype(np.float32)  # 转为float32以避免计算溢出
-        result = None
 
         if noise_type == "高斯噪声":
             # 高斯噪声：生成均值为0、标准差为intensity的噪声
-            sigma = self.params['intensity']
-            noise = np.random.normal(loc=0, scale=sigma, size=frame.shape)
-            result = frame + noise  # 叠加噪声
+            out += self._gaussian_noise(out.shape)  # 叠加噪声
 
         elif noise_type == "泊松噪声":
             # 泊松噪声：与图像亮度相关，亮区域噪声更明显
             scale = self.params['intensity']
             # 归一化图像到[0, scale]范围，生成泊松分布噪声
-            normalized_frame = frame / 255.0 * scale
-            poisson_samples = np.random.poisson(normalized_frame)  # 泊松采样
-            result = poisson_samples / scale * 255.0  # 还原到[0,255]范围
+            out *= scale / 255.0
+            np.copyto(out, self._rng.poisson(out), casting='unsafe')  # 泊松采样（整数样本写回float32缓冲区）
+            out *= 255.0 / scale  # 还原到[0,255]范围
 
         elif noise_type == "椒盐噪声":
             # 椒盐噪声：随机生成白色（盐）和黑色（椒）噪声点
-            density = self.params['density']
-            salt_ratio = self.params['salt_pepper_ratio']
-            intensity = self.params['intensity']
-
-            # 计算总像素数和噪声像素数
-            height, width = frame.shape[:2]
-            total_pixels = height * width
-            total_noise_pixels = int(total_pixels * density)  # 总噪声像素数
-
-            # 分配盐噪声和椒噪声的数量
-            salt_pixels = int(total_noise_pixels * salt_ratio)
-            pepper_pixels = total_noise_pixels - salt_pixels
-
-            # 随机生成噪声位置坐标
-            # 盐噪声（白色）坐标
-            salt_y = np.random.randint(0, height, salt_pixels)
-            salt_x = np.random.randint(0, width, salt_pixels)
-            # 椒噪声（黑色）坐标
-            pepper_y = np.random.randint(0, height, pepper_pixels)
-            pepper_x = np.random.randint(0, width, pepper_pixels)
-
-            # 应用噪声（受强度控制明暗程度）
-            result = frame.copy()
-            result[salt_y, salt_x] = 255 * intensity  # 盐噪声（白色）
-            result[pepper_y, pepper_x] = 0 * intensity  # 椒噪声（黑色）
-
-        # 确保像素值在[0, 255]范围内，转回uint8格式
-        return np.clip(result, 0, 255).astype(np.uint8)
+            self._add_salt_pepper(out)
+
+        # 确保像素值在[0, 255]范围内
+        np.clip(out, 0, 255, out=out)
+
+    @staticmethod
+    def _check_rgb(data: np.ndarray) -> None:
+        """确保输入格式正确：RGB图像 (H, W, 3)"""
+        if len(data.shape) != 3 or data.shape[2] != 3:
+            raise ValueError(f"输入数据必须是RGB格式的图像 (H, W, 3)，当前形状: {data.shape}")
+
+    def _gaussian_noise(self, shape: tuple) -> np.ndarray:
+        """
+        生成均值为0、标准差为intensity的float32高斯噪声（写入复用的工作缓冲区，下次调用时覆盖）
+
+        参数:
+            shape: 噪声形状 (H, W, 3)
+        """
+        noise = self._scratch_buffer('noise', shape)
+        sigma = float(self.params['intensity'])
+        channels = shape[-1]
+        # cv2.randn按多通道矩阵处理，均值/标准差需按通道给出
+        cv2.randn(noise, (0.0,) * channels, (sigma,) * channels)
+        return noise
+
+    def _add_salt_pepper(self, out: np.ndarray) -> None:
+        """
+        原地添加椒盐噪声
 
+        参数:
+            out: uint8或float32类型的RGB图像/视频帧 (H, W, 3)
+        """
+        density = self.params['density']
+        salt_ratio = self.params['salt_pepper_ratio']
+        intensity = self.params['intensity']
+
+        # 计算总像素数和噪声像素数
+        height, width = out.shape[:2]
+        total_pixels = height * width
+        total_noise_pixels = int(total_pixels * density)  # 总噪声像素数
+
+        # 分配盐噪声和椒噪声的数量
+        salt_pixels = int(total_noise_pixels * salt_ratio)
+        pepper_pixels = total_noise_pixels - salt_pixels
+
+        # 盐噪声的值（受强度控制明暗程度）：先取float32再转换为输出类型，uint8上的截断与float32路径一致
+        salt_value = out.dtype.type(np.float32(255 * intensity))
+
+        # 随机生成噪声位置坐标
+        # 盐噪声（白色）坐标
+        salt_y = np.random.randint(0, height, salt_pixels)
+        salt_x = np.random.randint(0, width, salt_pixels)
+        # 椒噪声（黑色）坐标
+        pepper_y = np.random.randint(0, height, pepper_pixels)
+        pepper_x = np.random.randint(0, width, pepper_pixels)
+
+        # 应用噪声
+        out[salt_y, salt_x] = salt_value  # 盐噪声（白色）
+        out[pepper_y, pepper_x] = 0  # 椒噪声（黑色）
@@ -66,9 +66,14 @@ class ResampleDegradation(BaseDegradation):
             f"插值方式: {interp_name}"
         )
 
+        # 尺寸极小时下采样尺寸可能与原尺寸相同，两次resize都是原样拷贝，直接返回输入
+        if new_h == h and new_w == w:
+            return data
+
         try:
-            # 第一步：下采样到新尺寸
-            downsampled = cv2.resize(data, (new_w, new_h), interpolation=interp)
+            # 第一步：下采样到新尺寸（中间结果写入复用的工作缓冲区，视频逐帧不再重新分配）
+            downsampled = self._scratch_buffer('downsampled', (new_h, new_w) + data.shape[2:], data.dtype)
+            cv2.resize(data, (new_w, new_h), dst=downsampled, interpolation=interp)
             # 第二步：上采样回原始尺寸
             return cv2.resize(downsampled, (w, h), interpolation=interp)
         except Exception as e:
@@ -1,18 +1,27 @@
 import os
+import importlib
+import itertools
 from pathlib import Path
-from typing import Dict, Any
+from types import MappingProxyType
+from typing import Dict, Any, Optional, Tuple
 import logging
+from concurrent.futures import ProcessPoolExecutor
 
+from core.base_degradation import BaseDegradation
 from utils.image_processor import ImageProcessor
 from utils.video_processor import VideoProcessor
-from utils.file_io import save_uploaded_file, generate_output_filename
+from utils.file_io import save_uploaded_file, generate_output_filename, FILE_ROOT
 
 # 配置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# 退化处理类映射表 - 用于动态加载退化处理
-DEGRADATION_CLASSES = {
+# 处理结果输出目录（导入时创建一次，不在每次处理时重复检查）
+OUTPUT_DIR = Path("processed")
+OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+
+# 退化处理类路径表 - 导入本模块时解析为类对象
+DEGRADATION_CLASS_PATHS = {
     # 通用退化
     "blur": "degradations.common.blur.BlurDegradation",
     "noise": "degradations.common.noise.NoiseDegradation",
@@ -30,9 +39,34 @@ DEGRADATION_CLASSES = {
     "shake":"degradations.advanced.video.shake.ShakeDegradation"
 }
 
+# 导入失败的退化类型 -> 错误信息（这些类型不会出现在DEGRADATION_CLASSES中）
+_DEGRADATION_IMPORT_ERRORS: Dict[str, str] = {}
+
+
+def _import_degradation_classes() -> Dict[str, type]:
+    """导入所有退化处理类，单个模块导入失败只移除对应类型，注册表其余部分仍可用"""
+    classes = {}
+    for degradation_type, class_path in DEGRADATION_CLASS_PATHS.items():
+        module_path, class_name = class_path.rsplit('.', 1)
+        try:
+            classes[degradation_type] = getattr(importlib.import_module(module_path), class_name)
+        except ImportError as e:
+            _DEGRADATION_IMPORT_ERRORS[degradation_type] = f"退化处理模块 {module_path} 不存在或导入失败: {str(e)}"
+        except AttributeError as e:
+            _DEGRADATION_IMPORT_ERRORS[degradation_type] = f"退化处理类 {class_name} 不存在: {str(e)}"
+        else:
+            continue
+        logger.warning(f"退化处理类导入失败，已从注册表中移除: {degradation_type}: "
+                       f"{_DEGRADATION_IMPORT_ERRORS[degradation_type]}")
+    return classes
+
+
+# 退化处理类映射表（退化类型 -> 类对象）
+DEGRADATION_CLASSES = _import_degradation_classes()
+
 
 def load_degradation_class(degradation_type: str):
-    """动态加载退化处理类
+    """获取退化处理类（注册表在导入时已解析，这里只是一次字典查找）
 
     Args:
         degradation_type: 退化类型名称
@@ -40,64 +74,45 @@ def load_degradation_class(degradation_type: str):
     Returns:
         退化处理类
     """
-    if degradation_type not in DEGRADATION_CLASSES:
+    degradation_class = DEGRADATION_CLASSES.get(degradation_type)
+    if degradation_class is None:
+        if degradation_type in _DEGRADATION_IMPORT_ERRORS:
+            raise ImportError(_DEGRADATION_IMPORT_ERRORS[degradation_type])
         raise ValueError(f"不支持的退化类型: {degradation_type}，支持的类型: {list(DEGRADATION_CLASSES.keys())}")
+    return degradation_class
 
-    # 解析类路径
-    module_path, class_name = DEGRADATION_CLASSES[degradation_type].rsplit('.', 1)
 
-    # 动态导入模块和类
-    import importlib
-    try:
-        module = importlib.import_module(module_path)
-        return getattr(module, class_name)
-    except ImportError as e:
-        logger.error(f"无法导入退化处理模块 {module_path}: {str(e)}")
-        raise ImportError(f"退化处理模块 {module_path} 不存在或导入失败")
-    except AttributeError as e:
-        logger.error(f"退化处理类 {class_name} 在模块 {module_path} 中不存在: {str(e)}")
-        raise AttributeError(f"退化处理类 {class_name} 不存在")
+def preload_degradation_classes() -> None:
+    """进程池initializer：工作进程（spawn启动）导入本模块时即解析全部退化处理类，启动时完成而不是等到第一个任务"""
+    logger.info(f"已加载 {len(DEGRADATION_CLASSES)} 个退化处理类")
 
 
-def process_image(image_path: str, degradation_type: str, params: Dict) -> str:
+def process_image(image_path: str, degradation_type: str, degradation: BaseDegradation) -> str:
     """处理图像
 
     Args:
         image_path: 图像路径
-        degradation_type: 退化类型
-        params: 退化参数
+        degradation_type: 退化类型（用于日志和输出文件名）
+        degradation: 已实例化的退化处理器
 
     Returns:
         处理后的图像路径
     """
-    logger.info(f"开始处理图像: {image_path}, 退化类型: {degradation_type}")
+    logger.info("开始处理图像: %s, 退化类型: %s", image_path, degradation_type)
 
     try:
-        # 验证输入文件
-        if not os.path.exists(image_path):
-            raise FileNotFoundError(f"图像文件不存在: {image_path}")
-
-        # 加载图像
+        # 加载图像（文件不存在时load_image抛出FileNotFoundError，无需重复检查）
         image = ImageProcessor.load_image(image_path)
         if image is None:
             raise ValueError(f"无法加载图像: {image_path}")
 
-        # 加载并实例化退化处理类
-        degradation_class = load_degradation_class(degradation_type)
-        degradation = degradation_class(params)
-
         # 应用退化处理
         processed_image = degradation.apply(image)
         if processed_image is None:
             raise RuntimeError(f"退化处理失败: {degradation_type}")
 
         # 生成输出路径
-        output_filename = generate_output_filename(image_path, degradation_type)
-
-        # 确保输出目录存在
-        output_dir = Path("processed")
-        output_dir.mkdir(parents=True, exist_ok=True)
-        output_path = str(output_dir / Path(output_filename).name)
+        output_path = generate_output_filename(image_path, degradation_type, output_dir=OUTPUT_DIR)
 
         # 保存处理后的图像
         ImageProcessor.save_image(processed_image, output_path)
@@ -106,7 +121,7 @@ def process_image(image_path: str, degradation_type: str, params: Dict) -> str:
         if not os.path.exists(output_path):
             raise RuntimeError(f"图像保存失败: {output_path}")
 
-        logger.info(f"图像处理完成，保存至: {output_path}")
+        logger.info("图像处理完成，保存至: %s", output_path)
         return output_path
 
     except Exception as e:
@@ -114,70 +129,67 @@ def process_image(image_path: str, degradation_type: str, params: Dict) -> str:
         raise
 
 
-def process_video(video_path: str, degradation_type: str, params: Dict) -> str:
+def process_video(video_path: str, degradation_type: str, degradation: BaseDegradation,
+                  verify: bool = False) -> str:
     """处理视频
 
     Args:
         video_path: 视频路径
-        degradation_type: 退化类型
-        params: 退化参数
+        degradation_type: 退化类型（用于日志和输出文件名）
+        degradation: 已实例化的退化处理器
+        verify: 是否额外验证输出视频的完整性（MP4只检查box结构，其他格式解码抽样帧），默认只检查文件非空
 
     Returns:
         处理后的视频路径（已优化为浏览器兼容格式）
     """
-    logger.info(f"开始处理视频: {video_path}, 退化类型: {degradation_type}")
+    logger.info("开始处理视频: %s, 退化类型: %s", video_path, degradation_type)
 
     try:
-        # 验证输入文件
-        if not os.path.exists(video_path):
-            raise FileNotFoundError(f"视频文件不存在: {video_path}")
-
-        # 读取视频
-        frames, video_info = VideoProcessor.read_video(video_path)
-        if not frames:
-            raise ValueError(f"无法读取视频帧: {video_path}")
-
-        logger.info(f"视频信息: {video_info}")
-
-        # 加载并实例化退化处理类
-        degradation_class = load_degradation_class(degradation_type)
-        degradation = degradation_class(params)
-
-        # 对每一帧应用退化处理
-        logger.info(f"开始处理 {len(frames)} 帧视频...")
-        processed_frames = VideoProcessor.process_video_frames(frames, degradation.apply)
+        # 读取视频信息（只读容器头，不解码帧；文件不存在时抛出FileNotFoundError，无需重复检查）
+        video_info = VideoProcessor.probe(video_path)
+        logger.info("视频信息: %s", video_info)
 
-        if not processed_frames:
-            raise RuntimeError(f"视频帧处理失败: {degradation_type}")
+        # 生成输出路径（输出文件名以.mp4结尾，浏览器兼容性）
+        final_output_path = generate_output_filename(video_path, degradation_type, output_dir=OUTPUT_DIR,
+                                                     force_ext='.mp4')
 
-        # 生成输出路径
-        output_filename = generate_output_filename(video_path, degradation_type)
-
-        # 确保输出目录存在
-        output_dir = Path("processed")
-        output_dir.mkdir(parents=True, exist_ok=True)
-        final_output_path = str(output_dir / Path(output_filename).name)
-
-        # 确保输出文件名以.mp4结尾（浏览器兼容性）
-        if not final_output_path.endswith('.mp4'):
-            final_output_path = os.path.splitext(final_output_path)[0] + '.mp4'
-
-        # 使用增强的VideoProcessor保存视频（自动处理浏览器兼容性）
         fps = video_info.get("fps", 30.0)  # 默认30fps
-        logger.info(f"使用 {fps} FPS 保存视频到: {final_output_path}")
-
-        # 新的VideoProcessor.write_video已经内置了浏览器兼容性处理
-        actual_output_path = VideoProcessor.write_video(processed_frames, final_output_path, fps=fps)
+        logger.info("开始处理 %s 帧视频，使用 %s FPS 保存到: %s",
+                    video_info.get('frame_count', 0), fps, final_output_path)
+
+        # 解码→退化→编码流水线：解码和退化各占一个后台线程，编码在当前线程，
+        # 三个阶段经有界队列并行推进（OpenCV/NumPy运算释放GIL），内存中只保留队列中的帧
+        frames = VideoProcessor.iter_frames(video_path)
+        first_frame = next(frames, None)  # 至少要解码出一帧（不再整段读入内存后检查帧列表）
+        if first_frame is None:
+            raise ValueError(f"无法读取视频帧: {video_path}")
+        frames = VideoProcessor.prefetch(itertools.chain([first_frame], frames), name="video-decode")
+        processed_frames = VideoProcessor.prefetch(
+            VideoProcessor.iter_processed_frames(
+                frames, degradation.apply, total_frames=video_info.get("frame_count") or None
+            ),
+            name="video-degrade"
+        )
+        actual_output_path = VideoProcessor.write_video_stream(processed_frames, final_output_path, fps=fps)
 
-        # 验证输出文件是否成功创建
-        if not os.path.exists(actual_output_path):
+        # 验证输出文件是否成功创建且非空（一次stat，不重新读取视频）
+        try:
+            output_size = os.stat(actual_output_path).st_size
+        except FileNotFoundError:
+            output_size = 0
+        if output_size == 0:
             raise RuntimeError(f"视频保存失败: {actual_output_path}")
 
-        # 验证视频是否可播放
-        if not VideoProcessor.verify_video_playable(actual_output_path):
-            logger.warning(f"生成的视频可能无法正常播放: {actual_output_path}")
+        # 按需验证视频是否可播放（MP4只读取box头，不启动解码器）
+        if verify:
+            if actual_output_path.endswith('.mp4'):
+                playable = VideoProcessor.verify_mp4_structure(actual_output_path)
+            else:
+                playable = VideoProcessor.verify_video_playable(actual_output_path)
+            if not playable:
+                logger.warning(f"生成的视频可能无法正常播放: {actual_output_path}")
 
-        logger.info(f"视频处理完成，最终输出: {actual_output_path}")
+        logger.info("视频处理完成，最终输出: %s", actual_output_path)
         return actual_output_path
 
     except Exception as e:
@@ -185,6 +197,19 @@ def process_video(video_path: str, degradation_type: str, params: Dict) -> str:
         raise
 
 
+# 不同退化类型的默认参数（模块常量，只读）
+_DEFAULT_PARAMS = MappingProxyType({
+    "blur": {"kernel_size": 5, "sigma": 1.0},
+    "noise": {"noise_type": "gaussian", "intensity": 0.1},
+    "resample": {"scale_factor": 0.5, "interpolation": "bilinear"},
+    "compression": {"quality": 80, "format": "jpeg"},
+    "aliasing": {"downsample_factor": 2},
+    "scratch": {"num_scratches": 3, "intensity": 0.5},
+    "motion_blur": {"blur_length": 10, "angle": 0},
+    "flicker": {"intensity": 0.3, "frequency": 5}
+})
+
+
 def validate_degradation_params(degradation_type: str, params: Dict) -> Dict:
     """验证和标准化退化参数
 
@@ -198,28 +223,15 @@ def validate_degradation_params(degradation_type: str, params: Dict) -> Dict:
     if not isinstance(params, dict):
         params = {}
 
-    # 为不同退化类型设置默认参数
-    default_params = {
-        "blur": {"kernel_size": 5, "sigma": 1.0},
-        "noise": {"noise_type": "gaussian", "intensity": 0.1},
-        "resample": {"scale_factor": 0.5, "interpolation": "bilinear"},
-        "compression": {"quality": 80, "format": "jpeg"},
-        "aliasing": {"downsample_factor": 2},
-        "scratch": {"num_scratches": 3, "intensity": 0.5},
-        "motion_blur": {"blur_length": 10, "angle": 0},
-        "flicker": {"intensity": 0.3, "frequency": 5}
-    }
-
-    # 合并默认参数和用户参数
-    validated_params = default_params.get(degradation_type, {}).copy()
-    validated_params.update(params)
+    # 合并默认参数和用户参数（一次字典合并，用户参数优先）
+    validated_params = {**_DEFAULT_PARAMS.get(degradation_type, {}), **params}
 
-    logger.info(f"退化参数验证完成: {degradation_type} -> {validated_params}")
+    logger.info("退化参数验证完成: %s -> %s", degradation_type, validated_params)  # 延迟格式化
     return validated_params
 
 
-def single_main_demo(media_path: str, media_type: str, degradation_type: str, degradation_params: Dict = None) -> Dict[
-    str, Any]:
+def single_main_demo(media_path: str, media_type: str, degradation_type: str, degradation_params: Dict = None,
+                     file_stat: Optional[os.stat_result] = None) -> Dict[str, Any]:
     """单种退化处理演示主函数
 
     Args:
@@ -227,6 +239,7 @@ def single_main_demo(media_path: str, media_type: str, degradation_type: str, de
         media_type: 媒体类型 ("image" 或 "video")
         degradation_type: 退化类型
         degradation_params: 退化参数
+        file_stat: 调用方已获取的文件stat结果（提供时跳过存在性检查并直接取文件大小）
 
     Returns:
         处理结果字典
@@ -235,44 +248,49 @@ def single_main_demo(media_path: str, media_type: str, degradation_type: str, de
     if degradation_params is None:
         degradation_params = {}
 
-    logger.info(f"开始单种退化处理: {media_path}, 类型: {media_type}, 退化: {degradation_type}")
+    logger.info("开始单种退化处理: %s, 类型: %s, 退化: %s", media_path, media_type, degradation_type)
 
     try:
-        # 验证媒体文件存在
-        if not os.path.exists(media_path):
-            raise FileNotFoundError(f"媒体文件不存在: {media_path}")
+        # 验证媒体文件存在（调用方已通过resolve_media_path校验时跳过）；一次stat同时得到存在性和文件大小
+        if file_stat is None:
+            try:
+                file_stat = os.stat(media_path)
+            except FileNotFoundError:
+                raise FileNotFoundError(f"媒体文件不存在: {media_path}")
 
         # 验证媒体类型
         if media_type not in ["image", "video"]:
             raise ValueError(f"不支持的媒体类型: {media_type}，支持的类型: image, video")
 
-        # 验证退化类型
-        if degradation_type not in DEGRADATION_CLASSES:
-            raise ValueError(f"不支持的退化类型: {degradation_type}，支持的类型: {list(DEGRADATION_CLASSES.keys())}")
+        # 验证退化类型（不支持的类型抛出ValueError）
+        degradation_class = load_degradation_class(degradation_type)
 
-        # 验证退化参数
+        # 验证退化参数并实例化退化处理器（只实例化一次，传给具体的处理函数）
         validated_params = validate_degradation_params(degradation_type, degradation_params)
+        degradation = degradation_class(validated_params)
 
         # 获取文件大小信息
-        original_size = os.path.getsize(media_path)
-        logger.info(f"原始文件大小: {original_size / (1024 * 1024):.2f} MB")
+        original_size = file_stat.st_size
+        logger.info("原始文件大小: %.2f MB", original_size / (1024 * 1024))  # 延迟格式化
 
         # 根据媒体类型处理
         if media_type == "image":
-            processed_path = process_image(media_path, degradation_type, validated_params)
+            processed_path = process_image(media_path, degradation_type, degradation)
         elif media_type == "video":
-            processed_path = process_video(media_path, degradation_type, validated_params)
+            processed_path = process_video(media_path, degradation_type, degradation)
 
         # 获取处理后文件信息
-        processed_size = os.path.getsize(processed_path) if os.path.exists(processed_path) else 0
-        logger.info(f"处理后文件大小: {processed_size / (1024 * 1024):.2f} MB")
+        try:
+            processed_size = os.stat(processed_path).st_size
+        except FileNotFoundError:
+            processed_size = 0
+        logger.info("处理后文件大小: %.2f MB", processed_size / (1024 * 1024))
 
-        # 计算相对路径用于前端显示
+        # 计算相对路径用于前端显示（Windows上跨盘符时relpath抛出ValueError，退回原路径）
         try:
-            from utils.file_io import FILE_ROOT
             relative_original = os.path.relpath(media_path, FILE_ROOT)
             relative_processed = os.path.relpath(processed_path, FILE_ROOT)
-        except Exception:
+        except ValueError:
             relative_original = media_path
             relative_processed = processed_path
 
@@ -290,12 +308,16 @@ def single_main_demo(media_path: str, media_type: str, degradation_type: str, de
             "message": f"{media_type}退化处理完成"
         }
 
-        logger.info(f"退化处理成功完成: {degradation_type}")
+        logger.info("退化处理成功完成: %s", degradation_type)
         return result
 
     except Exception as e:
         error_msg = f"退化处理失败: {str(e)}"
-        logger.error(error_msg, exc_info=True)
+        # 完整堆栈只在DEBUG级别输出，批量处理中大量任务失败时只记录一行摘要
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.error(error_msg, exc_info=True)
+        else:
+            logger.error("%s (%s)", error_msg, type(e).__name__)
 
         return {
             "original_path": media_path,
@@ -309,48 +331,62 @@ def single_main_demo(media_path: str, media_type: str, degradation_type: str, de
         }
 
 
+def _run_batch_job(job: Tuple[str, Dict]) -> Dict[str, Any]:
+    """执行批量处理中的单个 (媒体文件, 退化配置) 任务（模块级函数，可被进程池序列化）
+
+    Args:
+        job: (媒体文件路径, 退化配置) 元组
+
+    Returns:
+        单个任务的处理结果字典
+    """
+    media_file, config = job
+    try:
+        return single_main_demo(
+            media_path=media_file,
+            media_type=config.get("media_type", "image"),
+            degradation_type=config.get("degradation_type", "blur"),
+            degradation_params=config.get("params", {})
+        )
+    except Exception as e:
+        return {
+            "original_path": media_file,
+            "degradation_type": config.get("degradation_type", "unknown"),
+            "status": "error",
+            "error": str(e)
+        }
+
+
 # 便捷函数：批量退化处理
-def batch_degradation_demo(media_files: list, degradation_configs: list) -> Dict[str, Any]:
+def batch_degradation_demo(media_files: list, degradation_configs: list, parallel: bool = True,
+                           max_workers: Optional[int] = None) -> Dict[str, Any]:
     """批量退化处理演示
 
     Args:
         media_files: 媒体文件路径列表
         degradation_configs: 退化配置列表，每个配置包含 {media_type, degradation_type, params}
+        parallel: 是否使用进程池并行处理各任务（调试时可关闭，按顺序串行执行）
+        max_workers: 进程池的最大进程数，默认为CPU核数
 
     Returns:
         批量处理结果
     """
-    results = []
-    successful = 0
-    failed = 0
-
-    logger.info(f"开始批量退化处理: {len(media_files)} 个文件, {len(degradation_configs)} 种配置")
-
-    for media_file in media_files:
-        for config in degradation_configs:
-            try:
-                result = single_main_demo(
-                    media_path=media_file,
-                    media_type=config.get("media_type", "image"),
-                    degradation_type=config.get("degradation_type", "blur"),
-                    degradation_params=config.get("params", {})
-                )
-
-                if result["status"] == "success":
-                    successful += 1
-                else:
-                    failed += 1
-
-                results.append(result)
-
-            except Exception as e:
-                failed += 1
-                results.append({
-                    "original_path": media_file,
-                    "degradation_type": config.get("degradation_type", "unknown"),
-                    "status": "error",
-                    "error": str(e)
-                })
+    # 每个 (文件, 配置) 任务读写各自的文件、互不共享状态，可以独立并行
+    jobs = [(media_file, config) for media_file in media_files for config in degradation_configs]
+
+    logger.info("开始批量退化处理: %d 个文件, %d 种配置", len(media_files), len(degradation_configs))
+
+    if parallel and len(jobs) > 1:
+        # 工作进程启动时预加载退化处理类；单个任务是整张图像/整段视频的处理，逐个分发负载更均衡
+        workers = min(max_workers or os.cpu_count() or 1, len(jobs))
+        logger.info("使用 %d 个进程并行处理 %d 个任务", workers, len(jobs))
+        with ProcessPoolExecutor(max_workers=workers, initializer=preload_degradation_classes) as executor:
+            results = list(executor.map(_run_batch_job, jobs))
+    else:
+        results = [_run_batch_job(job) for job in jobs]
+
+    successful = sum(1 for result in results if result["status"] == "success")
+    failed = len(results) - successful
 
     return {
         "results": results,
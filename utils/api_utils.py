@@ -1,6 +1,13 @@
 import yaml
 import numpy as np
-from typing import Dict, Any, Optional
+from functools import lru_cache
+from typing import Dict, Any, Optional, Tuple
+
+# 优先使用libyaml的C解析器，PyYAML未编译C扩展时使用纯Python实现
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
 
 
 def format_degradation_result(result: Any, media_type: str) -> Dict:
@@ -32,14 +39,16 @@ def format_degradation_result(result: Any, media_type: str) -> Dict:
         }
 
 
+@lru_cache(maxsize=1)
 def load_degradation_config() -> Dict[str, Any]:
-    """加载降质配置文件（degradation_config.yaml）"""
+    """加载降质配置文件（degradation_config.yaml，只解析一次，返回的字典被所有调用方共享，不要修改）"""
     with open("config/degradation_config.yaml", "r") as f:
-        return yaml.safe_load(f)
+        return yaml.load(f, Loader=_YamlLoader)
 
 
-def get_supported_degradations(media_type: str) -> List[str]:
-    """获取指定媒体类型支持的所有降质类型"""
-    config = load_degradation_config()
-    return config["DEGRADATION_TYPES"][media_type]["common"] + \
-        config["DEGRADATION_TYPES"][media_type]["advanced"]
+@lru_cache(maxsize=8)
+def get_supported_degradations(media_type: str) -> Tuple[str, ...]:
+    """获取指定媒体类型支持的所有降质类型（通用类型在前，去重；返回不可变元组，按媒体类型缓存）"""
+    degradation_types = load_degradation_config()["DEGRADATION_TYPES"][media_type]
+    common = tuple(degradation_types["common"])
+    return common + tuple(t for t in degradation_types["advanced"] if t not in common)
@@ -1,15 +1,41 @@
+import io
 import os
 import uuid
 import mimetypes
 import subprocess
 import json
-from datetime import datetime
+import logging
+import shutil
+import stat
+import tempfile
+import time
+from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
 from typing import Tuple, Optional, List, Dict
 
+logger = logging.getLogger(__name__)
+
+# 可选依赖：PyAV（进程内读取容器头信息，未安装时回退到ffprobe子进程）
+try:
+    import av
+except ImportError:
+    av = None
+
+# 可选依赖：orjson（更快的JSON解析，直接解析bytes；未安装时使用标准库json）
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # 支持的文件扩展名（复用你原始的配置）
-IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp', '.gif', '.tiff', '.webp'}
-VIDEO_EXTENSIONS = {'.mp4', '.avi', '.mov', '.mkv', '.flv', '.wmv', '.mpeg', '.mpg', '.webm'}
+IMAGE_EXTENSIONS = frozenset({'.jpg', '.jpeg', '.png', '.bmp', '.gif', '.tiff', '.webp'})
+VIDEO_EXTENSIONS = frozenset({'.mp4', '.avi', '.mov', '.mkv', '.flv', '.wmv', '.mpeg', '.mpg', '.webm'})
+# 扩展名 -> 媒体类型，一次字典查询完成类型判断
+MEDIA_TYPE_BY_EXTENSION = {
+    **{ext: 'image' for ext in IMAGE_EXTENSIONS},
+    **{ext: 'video' for ext in VIDEO_EXTENSIONS},
+}
 
 # 配置目录（保持你原始的路径结构，添加Path类型兼容）
 BASE_DIR = os.path.abspath(os.path.dirname(__file__))
@@ -20,12 +46,79 @@ UPLOAD_DIR = FILE_ROOT
 # 为了兼容app.py的Path类型调用，同时保留字符串格式（关键适配）
 MEDIA_ROOT = Path(FILE_ROOT)  # 供app.py中Path类型使用
 MEDIA_ROOT_STR = FILE_ROOT    # 供字符串格式路径使用
+# FILE_ROOT的真实路径只在导入时解析一次（realpath对每一级路径都要lstat）
+_REAL_FILE_ROOT = os.path.realpath(FILE_ROOT)
+_REAL_FILE_ROOT_SEP = _REAL_FILE_ROOT + os.sep
+# 项目根目录下processed目录（处理结果输出目录）的真实路径，resolve_media_path允许访问
+_REAL_OUTPUT_DIR = os.path.realpath(os.path.join(os.path.dirname(FILE_ROOT), 'processed'))
+_REAL_OUTPUT_DIR_SEP = _REAL_OUTPUT_DIR + os.sep
 
 # 确保必要目录存在（复用你原始的创建逻辑）
 os.makedirs(FILE_ROOT, exist_ok=True)
 os.makedirs(PROCESSED_DIR, exist_ok=True)
 
 
+# 上传文件复制参数：缓冲区复制的块大小 / 零拷贝单次最大字节数
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+ZERO_COPY_MAX_CHUNK = 1 << 30
+
+
+def _copy_by_file_range(src_fd: int, dst_fd: int, offset: int) -> None:
+    """使用copy_file_range在内核态复制（支持reflink/NFS服务端复制）"""
+    while True:
+        copied = os.copy_file_range(src_fd, dst_fd, ZERO_COPY_MAX_CHUNK, offset)
+        if copied == 0:
+            break
+        offset += copied
+
+
+def _copy_by_sendfile(src_fd: int, dst_fd: int, offset: int) -> None:
+    """使用sendfile在内核态复制"""
+    while True:
+        copied = os.sendfile(dst_fd, src_fd, offset, ZERO_COPY_MAX_CHUNK)
+        if copied == 0:
+            break
+        offset += copied
+
+
+def _has_real_fd(src) -> bool:
+    """判断上传流背后是否有真实文件描述符，且调用fileno()不会产生副作用"""
+    if isinstance(src, tempfile.SpooledTemporaryFile):
+        # 内容仍在内存中时name为None，此时调用fileno()会强制把内容写入临时文件
+        return src.name is not None
+    return isinstance(src, (io.FileIO, io.BufferedReader, io.BufferedRandom))
+
+
+def copy_upload_stream(src, dst) -> None:
+    """将上传的临时文件写入目标文件
+
+    源文件已落盘（有真实文件描述符）时优先走copy_file_range/sendfile零拷贝，
+    不支持时（如Windows或内存中的小文件）退回1MiB缓冲区的copyfileobj
+    """
+    start = src.tell()
+
+    # 只对已落盘的文件对象尝试零拷贝，内存中的SpooledTemporaryFile和其他类文件对象直接走缓冲区复制
+    if _has_real_fd(src):
+        try:
+            src_fd, dst_fd = src.fileno(), dst.fileno()
+        except (AttributeError, OSError, io.UnsupportedOperation):
+            src_fd = dst_fd = None
+
+        if src_fd is not None:
+            for copy_func in (_copy_by_file_range, _copy_by_sendfile):
+                try:
+                    copy_func(src_fd, dst_fd, start)
+                    return
+                except (AttributeError, OSError) as e:
+                    logger.debug("%s不可用，尝试下一种方式: %s", copy_func.__name__, e)
+                    # 丢弃可能已写入的部分数据
+                    os.ftruncate(dst_fd, 0)
+                    os.lseek(dst_fd, 0, os.SEEK_SET)
+
+    src.seek(start)
+    shutil.copyfileobj(src, dst, length=UPLOAD_CHUNK_SIZE)
+
+
 def save_uploaded_file(file, upload_dir=UPLOAD_DIR):
     """保存上传的文件到指定目录（复用你原始代码，无需修改）"""
     try:
@@ -34,7 +127,7 @@ def save_uploaded_file(file, upload_dir=UPLOAD_DIR):
 
         os.makedirs(upload_dir, exist_ok=True)
 
-        timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
+        timestamp = time.strftime('%Y%m%d%H%M%S')
         file_ext = os.path.splitext(file.filename)[1].lower()
 
         if file_ext not in IMAGE_EXTENSIONS and file_ext not in VIDEO_EXTENSIONS:
@@ -42,7 +135,13 @@ def save_uploaded_file(file, upload_dir=UPLOAD_DIR):
 
         unique_filename = f"{timestamp}_{uuid.uuid4().hex[:8]}{file_ext}"
         file_path = os.path.join(upload_dir, unique_filename)
-        file.save(file_path)
+        # 上传流已落盘时在内核态复制（copy_file_range/sendfile），否则退回对象自身的save
+        stream = getattr(file, 'stream', None)
+        if stream is not None:
+            with open(file_path, 'wb') as dst:
+                copy_upload_stream(stream, dst)
+        else:
+            file.save(file_path)
 
         return file_path
     except Exception as e:
@@ -50,11 +149,13 @@ def save_uploaded_file(file, upload_dir=UPLOAD_DIR):
         raise
 
 
-def generate_output_filename(input_path, degradation_type, output_dir=PROCESSED_DIR):
-    """生成处理后的输出文件名（复用你原始代码，无需修改）"""
-    try:
-        os.makedirs(output_dir, exist_ok=True)
+def generate_output_filename(input_path, degradation_type, output_dir=PROCESSED_DIR, force_ext=None):
+    """生成处理后的输出文件名（复用你原始代码，无需修改）
 
+    force_ext: 指定输出扩展名（如".mp4"），为None时沿用输入文件的扩展名
+    只生成路径、不创建目录：output_dir由调用方预先创建（PROCESSED_DIR在模块导入时已创建），批量处理时不再逐个mkdir
+    """
+    try:
         if not input_path or not os.path.exists(input_path):
             raise ValueError("输入文件路径无效或文件不存在")
 
@@ -64,8 +165,8 @@ def generate_output_filename(input_path, degradation_type, output_dir=PROCESSED_
         if not degradation_type or not isinstance(degradation_type, str):
             raise ValueError("处理类型参数无效")
 
-        timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-        output_filename = f"{name}_{degradation_type}_{timestamp}{ext}"
+        timestamp = time.strftime('%Y%m%d%H%M%S')
+        output_filename = f"{name}_{degradation_type}_{timestamp}{ext if force_ext is None else force_ext}"
         return os.path.join(output_dir, output_filename)
     except Exception as e:
         print(f"生成输出文件名失败: {str(e)}")
@@ -81,14 +182,8 @@ def validate_media_type(file_path, expected_type=None) -> bool | Tuple[bool, Opt
         if not file_path or not isinstance(file_path, str):
             return (False, None) if expected_type is None else False
 
-        # 获取文件扩展名（小写）
-        ext = os.path.splitext(file_path)[1].lower()
-
-        if ext in IMAGE_EXTENSIONS:
-            media_type = 'image'
-        elif ext in VIDEO_EXTENSIONS:
-            media_type = 'video'
-        else:
+        media_type = media_type_from_name(file_path)
+        if media_type is None:
             return (False, None) if expected_type is None else False
 
         if expected_type is not None:
@@ -100,6 +195,15 @@ def validate_media_type(file_path, expected_type=None) -> bool | Tuple[bool, Opt
         return (False, None) if expected_type is None else False
 
 
+def media_type_from_name(file_name: str) -> Optional[str]:
+    """根据文件名的扩展名返回媒体类型（'image'/'video'），不支持时返回None
+
+    只做字符串切分和字典查询，用于目录遍历等热点路径；也接受完整路径。
+    validate_media_type/get_file_list共用此判断，扩展名按os.path.splitext切分（.png等点文件没有扩展名）
+    """
+    return MEDIA_TYPE_BY_EXTENSION.get(os.path.splitext(file_name)[1].lower())
+
+
 def get_file_size(file_path) -> Tuple[int, str]:
     """获取文件大小（修复Path类型兼容，统一返回格式）"""
     try:
@@ -130,11 +234,11 @@ def get_file_list(subdir='') -> Tuple[List[Dict], str, str]:
         files = []
         for entry in os.scandir(target_dir):
             if entry.is_file():
-                file_ext = os.path.splitext(entry.name)[1].lower()
-                all_extensions = IMAGE_EXTENSIONS | VIDEO_EXTENSIONS
-                if file_ext in all_extensions:
-                    _, file_type = validate_media_type(entry.name)
-                    size = entry.stat().st_size
+                # 扩展名直接查表得到媒体类型（不支持的扩展名为None）
+                file_type = media_type_from_name(entry.name)
+                if file_type is not None:
+                    st = entry.stat()  # 每个条目只取一次stat结果，大小和修改时间共用
+                    size = st.st_size
                     size_human = format_file_size(size)
 
                     files.append({
@@ -143,7 +247,7 @@ def get_file_list(subdir='') -> Tuple[List[Dict], str, str]:
                         'size': size,
                         'size_human': size_human,
                         'type': file_type,
-                        'modified': datetime.fromtimestamp(entry.stat().st_mtime).strftime('%Y-%m-%d %H:%M')
+                        'modified': time.strftime('%Y-%m-%d %H:%M', time.localtime(st.st_mtime))
                     })
 
         files.sort(key=lambda x: x['modified'], reverse=True)
@@ -172,6 +276,18 @@ def format_file_size(size_bytes) -> str:
         return "未知大小"
 
 
+def _is_within(real_path: str, real_root: str, real_root_sep: str, ignore_case: bool = False) -> bool:
+    """判断已解析的真实路径是否为real_root本身或位于其下（按路径分隔符判断，/foo/filebad 不算在 /foo/file 内）"""
+    if ignore_case:
+        real_path, real_root, real_root_sep = real_path.lower(), real_root.lower(), real_root_sep.lower()
+    return real_path == real_root or real_path.startswith(real_root_sep)
+
+
+def _is_within_file_root(real_path: str) -> bool:
+    """判断已解析的真实路径是否为FILE_ROOT本身或位于其下"""
+    return _is_within(real_path, _REAL_FILE_ROOT, _REAL_FILE_ROOT_SEP)
+
+
 def delete_file(file_path) -> bool:
     """删除指定文件（复用你原始代码，无需修改）"""
     try:
@@ -180,9 +296,8 @@ def delete_file(file_path) -> bool:
 
         full_path = os.path.join(FILE_ROOT, file_path)
         real_file_path = os.path.realpath(full_path)
-        real_file_root = os.path.realpath(FILE_ROOT)
 
-        if not real_file_path.startswith(real_file_root):
+        if not _is_within_file_root(real_file_path):
             print("安全错误：尝试删除FILE_ROOT外的文件")
             return False
 
@@ -195,6 +310,94 @@ def delete_file(file_path) -> bool:
         raise
 
 
+def _run_ffprobe(path: str) -> Dict:
+    """调用ffprobe子进程并返回解析后的JSON"""
+    result = subprocess.run(
+        [
+            "ffprobe", "-v", "quiet", "-threads", "1", "-print_format", "json",
+            "-show_format", "-show_streams",
+            path
+        ],
+        capture_output=True, check=True, timeout=15
+    )
+
+    if result.returncode != 0:
+        raise subprocess.CalledProcessError(result.returncode, "ffprobe")
+
+    # 直接解析bytes输出，省去文本解码
+    if orjson is not None:
+        return orjson.loads(result.stdout)
+    return json.loads(result.stdout)
+
+
+def _rational_to_str(rate) -> Optional[str]:
+    """将PyAV的Fraction帧率转换为ffprobe格式的字符串（如"30000/1001"）"""
+    if not rate:
+        return None
+    return f"{rate.numerator}/{rate.denominator}"
+
+
+def _probe_with_pyav(path: str) -> Dict:
+    """
+    使用PyAV在进程内读取容器头信息
+
+    返回与ffprobe -show_format -show_streams 相同结构的字典，
+    这样get_media_info的解析逻辑无需区分两种来源
+    """
+    with av.open(path) as container:
+        streams = []
+        for stream in container.streams:
+            ctx = stream.codec_context
+            info = {
+                "codec_type": stream.type,
+                "codec_name": ctx.name if ctx else None,
+                "codec_long_name": ctx.codec.long_name if ctx else None,
+                "bit_rate": stream.bit_rate or (ctx.bit_rate if ctx else None),
+            }
+            if stream.duration is not None and stream.time_base:
+                info["duration"] = float(stream.duration * stream.time_base)
+
+            if stream.type == "video":
+                info.update({
+                    "width": ctx.width,
+                    "height": ctx.height,
+                    "pix_fmt": ctx.pix_fmt,
+                    "r_frame_rate": _rational_to_str(stream.base_rate or stream.average_rate),
+                })
+            elif stream.type == "audio":
+                info.update({
+                    "sample_rate": ctx.sample_rate,
+                    "channels": ctx.layout.nb_channels if ctx.layout else None,
+                })
+            streams.append(info)
+
+        format_data = {
+            "format_name": container.format.name,
+            "bit_rate": container.bit_rate,
+        }
+        if container.duration is not None:
+            format_data["duration"] = container.duration / av.time_base
+
+    return {"streams": streams, "format": format_data}
+
+
+@lru_cache(maxsize=1024)
+def _probe_media_cached(path: str, mtime_ns: int, size: int) -> Dict:
+    """
+    获取媒体的ffprobe格式探测结果（优先PyAV，失败时回退ffprobe子进程）
+
+    mtime_ns/size只参与缓存键：文件被修改后键随之变化，旧结果自然失效。
+    返回的字典被缓存共享，调用方只能读取不能修改
+    """
+    if av is not None:
+        try:
+            return _probe_with_pyav(path)
+        except Exception as e:
+            logger.warning("PyAV读取媒体信息失败，回退到ffprobe: %s", e)
+
+    return _run_ffprobe(path)
+
+
 def get_media_info(file_path) -> Optional[Dict]:
     """
     修复：基于ffprobe获取真实媒体信息（替换你原始的模拟数据）
@@ -209,12 +412,16 @@ def get_media_info(file_path) -> Optional[Dict]:
             return None
 
         # 先获取基础信息（复用你原始的基础逻辑）
-        full_path = get_media_path(file_path)  # 调用get_media_path确保路径有效
+        resolved = resolve_media_path(file_path)  # 确保路径有效，同时得到stat结果
+        full_path = resolved.path
         is_valid, media_type = validate_media_type(full_path)
         if not is_valid:
             return None
 
-        file_size, file_size_human = get_file_size(full_path)
+        # 只stat一次，大小/时间/缓存键都从同一结果获取
+        file_stat = resolved.stat
+        file_size = file_stat.st_size
+        file_size_human = format_file_size(file_size)
         file_ext = os.path.splitext(full_path)[1].lower()[1:]  # 扩展名（不带点）
 
         # 初始化媒体信息字典
@@ -226,8 +433,8 @@ def get_media_info(file_path) -> Optional[Dict]:
             "file_size_human": file_size_human,
             "media_type": media_type,
             "format": file_ext,
-            "created_time": datetime.fromtimestamp(os.path.getctime(full_path)).strftime('%Y-%m-%d %H:%M:%S'),
-            "modified_time": datetime.fromtimestamp(os.path.getmtime(full_path)).strftime('%Y-%m-%d %H:%M:%S'),
+            "created_time": time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(file_stat.st_ctime)),
+            "modified_time": time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(file_stat.st_mtime)),
             # 待填充的ffprobe信息
             "width": None, "height": None, "video_codec": None,
             "fps": None, "duration": None, "video_bitrate": None,
@@ -235,22 +442,9 @@ def get_media_info(file_path) -> Optional[Dict]:
             "color_space": None, "bit_depth": None, "warning": None
         }
 
-        # 调用ffprobe获取详细信息（核心修复）
+        # 获取详细信息（按路径+修改时间+大小缓存；优先PyAV进程内探测，避免启动子进程）
         try:
-            # 修复：使用更详细的 ffprobe 命令
-            result = subprocess.run(
-                [
-                    "ffprobe", "-v", "quiet", "-print_format", "json",
-                    "-show_format", "-show_streams",
-                    full_path
-                ],
-                capture_output=True, text=True, check=True, timeout=15
-            )
-
-            if result.returncode != 0:
-                raise subprocess.CalledProcessError(result.returncode, "ffprobe")
-
-            ffprobe_data = json.loads(result.stdout)
+            ffprobe_data = _probe_media_cached(full_path, file_stat.st_mtime_ns, file_size)
             streams = ffprobe_data.get("streams", [])
             format_data = ffprobe_data.get("format", {})
 
@@ -361,25 +555,62 @@ def get_media_info(file_path) -> Optional[Dict]:
         return None
 
 
+def _iter_files(directory_path):
+    """遍历目录树中的所有文件，产出os.DirEntry（基于scandir的显式栈遍历）
+
+    与os.walk的默认行为一致：指向目录的符号链接不会被递归，无法读取的目录直接跳过；
+    条目的类型来自目录项本身，stat结果由DirEntry缓存
+    """
+    stack = [directory_path]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
+                    if not is_dir:
+                        yield entry
+                    elif not entry.is_symlink():
+                        stack.append(entry.path)
+        except OSError:
+            continue
+
+
 def get_directory_size(directory_path) -> int:
     """计算目录总大小（复用你原始代码，无需修改）"""
     try:
         total_size = 0
-        for dirpath, dirnames, filenames in os.walk(directory_path):
-            for filename in filenames:
-                file_path = os.path.join(dirpath, filename)
-                try:
-                    total_size += os.path.getsize(file_path)
-                except (OSError, IOError):
-                    continue
+        for entry in _iter_files(directory_path):
+            try:
+                total_size += entry.stat().st_size
+            except (OSError, IOError):
+                continue
         return total_size
     except Exception as e:
         print(f"计算目录大小失败: {str(e)}")
         return 0
 
 
+@dataclass(frozen=True)
+class ResolvedPath:
+    """解析后的媒体文件：绝对路径 + 解析时获取的stat结果（调用方无需再次访问文件系统）"""
+    path: str
+    stat: os.stat_result
+
+
 def get_media_path(file_path) -> str:
     """修复Windows系统路径处理，正确解析包含..\的相对路径，支持processed目录访问"""
+    return resolve_media_path(file_path).path
+
+
+def resolve_media_path(file_path) -> ResolvedPath:
+    """解析媒体文件路径并校验，存在性和文件类型只通过一次os.stat判断
+
+    Returns:
+        ResolvedPath(绝对路径, stat结果)
+    """
     try:
         if not file_path:
             raise ValueError("文件路径不能为空")
@@ -413,29 +644,25 @@ def get_media_path(file_path) -> str:
 
         # 5. 获取真实路径（解析符号链接等）
         real_full_path = os.path.realpath(full_path)
-        real_file_root = os.path.realpath(FILE_ROOT)
 
-        # 计算processed目录的真实路径
-        project_root = os.path.dirname(FILE_ROOT)
-        processed_dir = os.path.join(project_root, 'processed')
-        real_processed_dir = os.path.realpath(processed_dir)
-
-        # 6. 安全校验：允许访问FILE_ROOT或processed目录
-        is_in_file_root = real_full_path.lower().startswith(real_file_root.lower())
-        is_in_processed = real_full_path.lower().startswith(real_processed_dir.lower())
+        # 6. 安全校验：允许访问FILE_ROOT或processed目录（不区分大小写）
+        is_in_file_root = _is_within(real_full_path, _REAL_FILE_ROOT, _REAL_FILE_ROOT_SEP, ignore_case=True)
+        is_in_processed = _is_within(real_full_path, _REAL_OUTPUT_DIR, _REAL_OUTPUT_DIR_SEP, ignore_case=True)
 
         if not (is_in_file_root or is_in_processed):
             raise ValueError(f"不允许访问FILE_ROOT和processed目录外的文件: {file_path}")
 
-        # 7. 验证文件存在性和类型（保持不变）
-        if not os.path.exists(full_path):
+        # 7. 验证文件存在性和类型（一次stat同时判断存在性和是否为普通文件）
+        try:
+            file_stat = os.stat(full_path)
+        except OSError:
             raise FileNotFoundError(f"文件不存在: {file_path}")
-        if not os.path.isfile(full_path):
+        if not stat.S_ISREG(file_stat.st_mode):
             raise FileNotFoundError(f"路径不是文件: {file_path}")
         if not validate_media_type(full_path)[0]:
             raise FileNotFoundError(f"文件不是有效的媒体文件: {file_path}")
 
-        return full_path
+        return ResolvedPath(full_path, file_stat)
     except (FileNotFoundError, ValueError):
         raise
     except Exception as e:
@@ -464,9 +691,8 @@ def create_directory(dir_path) -> bool:
 
         full_path = os.path.join(FILE_ROOT, dir_path)
         real_dir_path = os.path.realpath(full_path)
-        real_file_root = os.path.realpath(FILE_ROOT)
 
-        if not real_dir_path.startswith(real_file_root):
+        if not _is_within_file_root(real_dir_path):
             print("安全错误：尝试在FILE_ROOT外创建目录")
             return False
 
@@ -487,9 +713,8 @@ def move_file(src_path, dest_path) -> bool:
         dest_full_path = os.path.join(FILE_ROOT, dest_path)
         real_src_path = os.path.realpath(src_full_path)
         real_dest_path = os.path.realpath(dest_full_path)
-        real_file_root = os.path.realpath(FILE_ROOT)
 
-        if not (real_src_path.startswith(real_file_root) and real_dest_path.startswith(real_file_root)):
+        if not (_is_within_file_root(real_src_path) and _is_within_file_root(real_dest_path)):
             print("安全错误：尝试在FILE_ROOT外移动文件")
             return False
 
@@ -518,9 +743,8 @@ def copy_file(src_path, dest_path) -> bool:
         dest_full_path = os.path.join(FILE_ROOT, dest_path)
         real_src_path = os.path.realpath(src_full_path)
         real_dest_path = os.path.realpath(dest_full_path)
-        real_file_root = os.path.realpath(FILE_ROOT)
 
-        if not (real_src_path.startswith(real_file_root) and real_dest_path.startswith(real_file_root)):
+        if not (_is_within_file_root(real_src_path) and _is_within_file_root(real_dest_path)):
             print("安全错误：尝试在FILE_ROOT外复制文件")
             return False
 
@@ -540,24 +764,20 @@ def copy_file(src_path, dest_path) -> bool:
 def cleanup_old_files(directory_path, days_old=30) -> Tuple[int, int]:
     """清理指定天数前的旧文件（复用你原始代码，无需修改）"""
     try:
-        import time
-
         cutoff_time = time.time() - (days_old * 24 * 60 * 60)
         deleted_count = 0
         freed_space = 0
 
-        for root, dirs, files in os.walk(directory_path):
-            for file in files:
-                file_path = os.path.join(root, file)
-                try:
-                    if os.path.getmtime(file_path) < cutoff_time:
-                        file_size = os.path.getsize(file_path)
-                        os.remove(file_path)
-                        deleted_count += 1
-                        freed_space += file_size
-                except (OSError, IOError) as e:
-                    print(f"删除文件失败 {file_path}: {str(e)}")
-                    continue
+        for entry in _iter_files(directory_path):
+            try:
+                st = entry.stat()  # 修改时间和大小共用一次stat结果
+                if st.st_mtime < cutoff_time:
+                    os.remove(entry.path)
+                    deleted_count += 1
+                    freed_space += st.st_size
+            except (OSError, IOError) as e:
+                print(f"删除文件失败 {entry.path}: {str(e)}")
+                continue
 
         return deleted_count, freed_space
     except Exception as e:
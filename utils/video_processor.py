@@ -3,12 +3,32 @@ import numpy as np
 import subprocess
 import tempfile
 import os
+import struct
 from pathlib import Path
 import logging
-from typing import List, Dict, Tuple, Callable, Optional
+import itertools
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import List, Dict, Tuple, Callable, Optional, Iterable, Iterator
 
 logger = logging.getLogger(__name__)
 
+# 可选依赖：PyAV（只读容器头获取视频信息，未安装时使用OpenCV）
+try:
+    import av
+except ImportError:
+    av = None
+
+# H.264硬件编码器（按优先级），均不可用时使用libx264软件编码
+HARDWARE_H264_ENCODERS = ("h264_nvenc", "h264_qsv", "h264_vaapi")
+VAAPI_DEVICE = os.getenv("VAAPI_DEVICE", "/dev/dri/renderD128")
+
+# prefetch队列中的结束标记
+_PREFETCH_END = object()
+
 
 class VideoProcessor:
     """增强的视频处理器，优化兼容性与错误处理"""
@@ -27,9 +47,161 @@ class VideoProcessor:
         }
     }
 
+    @staticmethod
+    def _capture_info(cap: cv2.VideoCapture, video_path: str) -> Dict:
+        """从已打开的VideoCapture读取容器头信息（不解码帧）"""
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30.0  # 默认为30fps
+        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        return {
+            "fps": fps,
+            "frame_count": frame_count,
+            "width": int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            "height": int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+            "duration": frame_count / fps if fps > 0 else 0,
+            "path": video_path
+        }
+
+    @staticmethod
+    def _open_capture(video_path: str) -> cv2.VideoCapture:
+        """打开视频文件，失败时抛出与read_video一致的异常"""
+        if not os.path.exists(video_path):
+            raise FileNotFoundError(f"视频文件不存在: {video_path}")
+
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            raise ValueError(f"无法打开视频文件（可能格式不支持）: {video_path}")
+        return cap
+
+    @staticmethod
+    def _probe_with_pyav(video_path: str) -> Dict:
+        """使用PyAV读取容器头中的视频流信息（不创建解码器）"""
+        with av.open(video_path) as container:
+            stream = container.streams.video[0]
+            fps = float(stream.average_rate or stream.base_rate or 0) or 30.0
+            if stream.duration is not None and stream.time_base:
+                duration = float(stream.duration * stream.time_base)
+            elif container.duration is not None:
+                duration = container.duration / av.time_base
+            else:
+                duration = 0
+            # 部分容器不记录nb_frames，按时长估算
+            frame_count = stream.frames or int(round(duration * fps))
+            return {
+                "fps": fps,
+                "frame_count": frame_count,
+                "width": stream.codec_context.width,
+                "height": stream.codec_context.height,
+                "duration": duration,
+                "path": video_path
+            }
+
+    @staticmethod
+    def probe(video_path: str) -> Dict:
+        """只读取视频信息（帧率、尺寸、帧数），不解码任何帧
+
+        安装了PyAV时直接读取容器头，否则通过OpenCV读取
+
+        Args:
+            video_path: 视频文件路径
+
+        Returns:
+            视频信息字典，字段与read_video返回的信息一致
+        """
+        if av is not None and os.path.exists(video_path):
+            try:
+                return VideoProcessor._probe_with_pyav(video_path)
+            except Exception as e:
+                logger.warning(f"PyAV读取视频信息失败，改用OpenCV: {str(e)}")
+
+        cap = VideoProcessor._open_capture(video_path)
+        try:
+            return VideoProcessor._capture_info(cap, video_path)
+        finally:
+            cap.release()
+
+    @staticmethod
+    def iter_frames(video_path: str) -> Iterator[np.ndarray]:
+        """逐帧读取视频（RGB格式），内存中只保留当前帧
+
+        文件不存在或无法打开时立即抛出异常，而不是等到第一次迭代
+
+        Args:
+            video_path: 视频文件路径
+
+        Returns:
+            RGB帧迭代器
+        """
+        cap = VideoProcessor._open_capture(video_path)
+
+        def _frames() -> Iterator[np.ndarray]:
+            try:
+                while True:
+                    ret, frame = cap.read()
+                    if not ret:
+                        break
+                    yield cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            finally:
+                cap.release()
+
+        return _frames()
+
+    @staticmethod
+    def prefetch(items: Iterable[np.ndarray], queue_size: int = 32, name: str = "prefetch") -> Iterator[np.ndarray]:
+        """在后台线程中迭代items，结果经有界队列按顺序产出
+
+        串联多个阶段时（解码→退化→编码），每个阶段各占一个线程并行流水，
+        内存中只保留队列中的少量帧；消费方提前结束时后台线程随之退出
+
+        Args:
+            items: 输入迭代器（如iter_frames或iter_processed_frames的结果）
+            queue_size: 队列中最多缓存的帧数
+            name: 后台线程名称
+
+        Returns:
+            与items顺序一致的迭代器
+        """
+        results = queue.Queue(maxsize=queue_size)
+        stop = threading.Event()
+
+        def _put(item) -> bool:
+            # 消费方停止时放弃写入，避免线程阻塞在满队列上
+            while not stop.is_set():
+                try:
+                    results.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def _worker() -> None:
+            try:
+                for item in items:
+                    if not _put(item):
+                        # 消费方提前结束，同时关闭上游的迭代器（释放VideoCapture等资源）
+                        if hasattr(items, 'close'):
+                            items.close()
+                        return
+                _put(_PREFETCH_END)
+            except BaseException as e:
+                _put(e)
+
+        worker = threading.Thread(target=_worker, name=name, daemon=True)
+        worker.start()
+        try:
+            while True:
+                item = results.get()
+                if item is _PREFETCH_END:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            stop.set()
+            worker.join()
+
     @staticmethod
     def read_video(video_path: str) -> Tuple[List[np.ndarray], Dict]:
-        """读取视频文件并转换为RGB格式帧
+        """读取视频文件并转换为RGB格式帧（整段视频读入内存，长视频请使用probe + iter_frames流式处理）
 
         Args:
             video_path: 视频文件路径
@@ -50,19 +222,10 @@ class VideoProcessor:
                 raise ValueError(f"无法打开视频文件（可能格式不支持）: {video_path}")
 
             # 获取视频基础信息
-            fps = cap.get(cv2.CAP_PROP_FPS) or 30.0  # 默认为30fps
-            frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-            width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-            height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-
-            video_info = {
-                "fps": fps,
-                "frame_count": frame_count,
-                "width": width,
-                "height": height,
-                "duration": frame_count / fps if fps > 0 else 0,
-                "path": video_path
-            }
+            video_info = VideoProcessor._capture_info(cap, video_path)
+            fps = video_info["fps"]
+            frame_count = video_info["frame_count"]
+            width, height = video_info["width"], video_info["height"]
 
             # 读取并转换帧（BGR→RGB）
             frames = []
@@ -91,55 +254,112 @@ class VideoProcessor:
             raise
 
     @staticmethod
-    def process_video_frames(
-            frames: List[np.ndarray],
+    def iter_processed_frames(
+            frames: Iterable[np.ndarray],
             processing_func: Callable[[np.ndarray], np.ndarray],
-            progress_interval: int = 10
-    ) -> List[np.ndarray]:
-        """处理视频帧并确保维度一致性
+            progress_interval: int = 10,
+            max_workers: int = 1,
+            total_frames: Optional[int] = None
+    ) -> Iterator[np.ndarray]:
+        """逐帧处理视频并按输入顺序产出结果，同时校验维度一致性
+
+        并行时最多只有 2*max_workers 帧在处理中，内存占用与视频长度无关
 
         Args:
-            frames: 输入帧列表(RGB格式)
+            frames: 输入帧（列表或迭代器，RGB格式）
             processing_func: 帧处理函数，接收单帧返回处理后帧
             progress_interval: 进度输出间隔（帧数）
+            max_workers: 并行处理的线程数（>1时使用线程池，要求processing_func不依赖帧顺序）
+            total_frames: 总帧数（仅用于进度输出，未知时为None）
 
         Returns:
-            处理后的帧列表
+            处理后帧的迭代器
 
         Raises:
-            ValueError: 帧为空或维度不一致
+            ValueError: 帧维度不一致或处理后帧格式错误
         """
-        if not frames:
-            raise ValueError("输入帧列表为空，无法处理")
-
-        try:
-            processed_frames = []
-            total_frames = len(frames)
-            # 获取参考帧尺寸（确保所有帧尺寸一致）
-            ref_height, ref_width = frames[0].shape[:2]
-
-            for i, frame in enumerate(frames):
-                # 进度输出
-                if i % progress_interval == 0:
-                    progress = (i + 1) / total_frames * 100
-                    logger.info(f"处理进度: {i + 1}/{total_frames} ({progress:.1f}%)")
+        ref_size = None
 
-                # 验证帧尺寸一致性
+        def _checked(frame_iter: Iterable[np.ndarray]) -> Iterator[np.ndarray]:
+            # 验证帧尺寸一致性（以第一帧为参考）
+            nonlocal ref_size
+            for i, frame in enumerate(frame_iter):
                 current_height, current_width = frame.shape[:2]
-                if current_height != ref_height or current_width != ref_width:
+                if ref_size is None:
+                    ref_size = (current_height, current_width)
+                elif ref_size != (current_height, current_width):
                     raise ValueError(
                         f"帧尺寸不一致: 第{i + 1}帧为 {current_width}x{current_height}, "
-                        f"预期 {ref_width}x{ref_height}"
+                        f"预期 {ref_size[1]}x{ref_size[0]}"
                     )
+                yield frame
 
-                # 处理帧
-                processed_frame = processing_func(frame)
+        def _log_progress(i: int) -> None:
+            if i % progress_interval == 0:
+                if total_frames:
+                    progress = (i + 1) / total_frames * 100
+                    logger.info(f"处理进度: {i + 1}/{total_frames} ({progress:.1f}%)")
+                else:
+                    logger.info(f"处理进度: 第{i + 1}帧")
+
+        # OpenCV/NumPy运算大多释放GIL，线程池即可获得接近线性的加速
+        executor = ThreadPoolExecutor(max_workers=max_workers) if max_workers > 1 else None
+        items = _checked(frames)
+        try:
+            if executor:
+                def _results() -> Iterator[np.ndarray]:
+                    # 有界提交窗口：按顺序取结果，保证输出顺序且不会一次读入全部帧
+                    pending = deque()
+                    for item in items:
+                        pending.append(executor.submit(processing_func, item))
+                        if len(pending) >= max_workers * 2:
+                            yield pending.popleft().result()
+                    while pending:
+                        yield pending.popleft().result()
+                results = _results()
+            else:
+                results = map(processing_func, items)
+
+            for i, processed_frame in enumerate(results):
+                _log_progress(i)
 
                 # 确保输出帧为RGB格式且尺寸一致
                 if len(processed_frame.shape) != 3 or processed_frame.shape[2] != 3:
                     raise ValueError(f"处理后帧格式错误: 第{i + 1}帧形状为 {processed_frame.shape}")
 
-                processed_frames.append(processed_frame)
+                yield processed_frame
+        finally:
+            if executor:
+                executor.shutdown(cancel_futures=True)
+
+    @staticmethod
+    def process_video_frames(
+            frames: List[np.ndarray],
+            processing_func: Callable[[np.ndarray], np.ndarray],
+            progress_interval: int = 10,
+            max_workers: int = 1
+    ) -> List[np.ndarray]:
+        """处理视频帧并确保维度一致性
+
+        Args:
+            frames: 输入帧列表(RGB格式)
+            processing_func: 帧处理函数，接收单帧返回处理后帧
+            progress_interval: 进度输出间隔（帧数）
+            max_workers: 并行处理的线程数（>1时使用线程池，要求processing_func不依赖帧顺序）
+
+        Returns:
+            处理后的帧列表
+
+        Raises:
+            ValueError: 帧为空或维度不一致
+        """
+        if not frames:
+            raise ValueError("输入帧列表为空，无法处理")
+
+        try:
+            processed_frames = list(VideoProcessor.iter_processed_frames(
+                frames, processing_func, progress_interval, max_workers, total_frames=len(frames)
+            ))
 
             logger.info(f"帧处理完成: 共处理 {len(processed_frames)} 帧")
             return processed_frames
@@ -215,41 +435,183 @@ class VideoProcessor:
             logger.error(f"OpenCV视频写入失败: {str(e)}", exc_info=True)
             raise
 
+    @staticmethod
+    @lru_cache(maxsize=1)
+    def _ffmpeg_available() -> bool:
+        """检查FFmpeg是否可用（结果在进程内缓存，避免每次写入都启动子进程）"""
+        try:
+            subprocess.run(
+                ["ffmpeg", "-version"],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                check=True
+            )
+            return True
+        except (subprocess.SubprocessError, FileNotFoundError):
+            return False
+
+    @staticmethod
+    @lru_cache(maxsize=1)
+    def _hardware_h264_encoder() -> Optional[str]:
+        """检测可用的H.264硬件编码器（NVENC > QSV > VAAPI），结果在进程内缓存
+
+        FFmpeg编译了某编码器不代表本机有对应硬件，因此对候选编码器试编码一帧确认可用
+
+        Returns:
+            编码器名称，无可用硬件编码器时返回None
+        """
+        if not VideoProcessor._ffmpeg_available():
+            return None
+        try:
+            listed = subprocess.run(
+                ["ffmpeg", "-hide_banner", "-encoders"],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                timeout=10
+            ).stdout.decode("utf-8", errors="ignore")
+        except (subprocess.SubprocessError, OSError):
+            return None
+
+        for encoder in HARDWARE_H264_ENCODERS:
+            if encoder not in listed:
+                continue
+            cmd = [
+                "ffmpeg", "-hide_banner", "-loglevel", "error",
+                "-f", "lavfi", "-i", "color=black:s=256x256:d=0.1",
+                "-frames:v", "1",
+                *VideoProcessor._h264_encoder_args(encoder, 23),
+                "-f", "null", "-"
+            ]
+            try:
+                subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=10, check=True)
+            except (subprocess.SubprocessError, OSError):
+                logger.info(f"硬件编码器 {encoder} 不可用，跳过")
+                continue
+            logger.info(f"使用硬件编码器: {encoder}")
+            return encoder
+        return None
+
+    @staticmethod
+    def _h264_encoder_args(encoder: str, crf: int) -> List[str]:
+        """生成指定H.264编码器的FFmpeg输出参数（统一输出yuv420p/main，保证浏览器兼容）"""
+        if encoder == "h264_nvenc":
+            return ["-c:v", "h264_nvenc", "-preset", "p4", "-rc", "vbr", "-cq", str(crf),
+                    "-pix_fmt", "yuv420p", "-profile:v", "main"]
+        if encoder == "h264_qsv":
+            return ["-c:v", "h264_qsv", "-global_quality", str(crf),
+                    "-pix_fmt", "nv12", "-profile:v", "main"]
+        if encoder == "h264_vaapi":
+            return ["-vaapi_device", VAAPI_DEVICE, "-vf", "format=nv12,hwupload",
+                    "-c:v", "h264_vaapi", "-qp", str(crf), "-profile:v", "main"]
+        return ["-c:v", "libx264", "-preset", "medium", "-crf", str(crf),
+                "-pix_fmt", "yuv420p", "-profile:v", "main", "-level", "3.1"]
+
+    @staticmethod
+    def _write_video_opencv_stream(
+            frames: Iterable[np.ndarray],
+            output_path: str,
+            fps: float = 30.0
+    ) -> str:
+        """使用OpenCV流式写入视频
+
+        帧只能消费一次，因此只在写入第一帧前按顺序挑选可用的编解码器，写入过程中失败直接抛出
+        """
+        frames_iter = iter(frames)
+        first_frame = next(frames_iter, None)
+        if first_frame is None:
+            raise ValueError("无帧数据可写入视频")
+
+        output_dir = os.path.dirname(output_path)
+        os.makedirs(output_dir, exist_ok=True)
+        height, width = first_frame.shape[:2]
+        base_path = os.path.splitext(output_path)[0]
+
+        for codec, ext in [("mp4v", ".mp4"), ("XVID", ".avi"), ("MJPG", ".avi"), ("avc1", ".mp4")]:
+            temp_path = base_path + ext
+            out = cv2.VideoWriter(temp_path, cv2.VideoWriter_fourcc(*codec), fps, (width, height))
+            if not out.isOpened():
+                logger.warning(f"编解码器 {codec} 无法初始化，跳过")
+                continue
+
+            try:
+                for frame in itertools.chain([first_frame], frames_iter):
+                    out.write(cv2.cvtColor(frame, cv2.COLOR_RGB2BGR))
+            except Exception:
+                out.release()
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise
+            out.release()
+
+            logger.info(f"OpenCV流式写入成功: {temp_path} (编解码器: {codec})")
+            return temp_path
+
+        raise RuntimeError("所有OpenCV编解码器均尝试失败，无法写入视频")
+
+    @staticmethod
+    def write_video_stream(
+            frames: Iterable[np.ndarray],
+            output_path: str,
+            fps: float = 30.0
+    ) -> str:
+        """流式写入视频：边处理边编码，内存中只保留正在处理的帧
+
+        与write_video不同，帧迭代器只能消费一次，因此在写入前选定方案：
+        FFmpeg可用时使用FFmpeg，否则使用OpenCV，中途失败不再尝试其他方案
+
+        Args:
+            frames: 帧迭代器(RGB格式)
+            output_path: 目标输出路径
+            fps: 帧率
+
+        Returns:
+            实际输出文件路径
+        """
+        logger.info(f"开始流式写入视频: {output_path} (帧率: {fps:.1f})")
+
+        if VideoProcessor._ffmpeg_available():
+            return VideoProcessor.write_video_ffmpeg(frames, output_path, fps)
+
+        logger.warning("未找到FFmpeg，使用OpenCV流式写入")
+        return VideoProcessor._write_video_opencv_stream(frames, output_path, fps)
+
     @staticmethod
     def write_video_ffmpeg(
-            frames: List[np.ndarray],
+            frames: Iterable[np.ndarray],
             output_path: str,
             fps: float = 30.0,
-            crf: int = 23  # 质量控制（0-51，越低质量越高）
+            crf: int = 23,  # 质量控制（0-51，越低质量越高）
+            hardware_encode: bool = True
     ) -> str:
-        """使用FFmpeg写入视频（推荐方案，兼容性更好）"""
-        if not frames:
+        """使用FFmpeg写入视频（推荐方案，兼容性更好）
+
+        frames可以是列表，也可以是逐帧产出的迭代器（流式写入）。
+        hardware_encode为True且检测到NVENC/QSV/VAAPI时使用硬件编码，否则使用libx264
+        """
+        frames_iter = iter(frames)
+        first_frame = next(frames_iter, None)
+        if first_frame is None:
             raise ValueError("无帧数据可写入视频")
 
         try:
             # 检查FFmpeg是否可用
-            try:
-                subprocess.run(
-                    ["ffmpeg", "-version"],
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    check=True
-                )
-            except (subprocess.SubprocessError, FileNotFoundError):
+            if not VideoProcessor._ffmpeg_available():
                 raise RuntimeError("未找到FFmpeg，请安装FFmpeg后重试")
 
             # 确保输出目录存在
             output_dir = os.path.dirname(output_path)
             os.makedirs(output_dir, exist_ok=True)
 
-            # 帧信息
-            height, width = frames[0].shape[:2]
-            total_frames = len(frames)
+            # 帧信息（迭代器无法预知总帧数）
+            height, width = first_frame.shape[:2]
+            total_frames = len(frames) if hasattr(frames, "__len__") else None
 
             # 构建输出路径（确保.mp4格式）
             if not output_path.endswith(".mp4"):
                 output_path = os.path.splitext(output_path)[0] + ".mp4"
 
+            encoder = (VideoProcessor._hardware_h264_encoder() if hardware_encode else None) or "libx264"
+
             # FFmpeg命令（通过管道输入原始帧数据）
             cmd = [
                 "ffmpeg",
@@ -261,19 +623,14 @@ class VideoProcessor:
                 "-r", f"{fps:.2f}",  # 帧率
                 "-i", "-",  # 从标准输入读取
 
-                # 输出配置（确保浏览器兼容）
-                "-c:v", "libx264",  # H.264编码
-                "-preset", "medium",  # 编码速度/质量平衡
-                "-crf", str(crf),  # 恒定质量模式
-                "-pix_fmt", "yuv420p",  # 浏览器兼容的像素格式
-                "-profile:v", "main",  # 兼容主流设备
-                "-level", "3.1",  # 编码级别
+                # 输出配置（H.264编码，确保浏览器兼容）
+                *VideoProcessor._h264_encoder_args(encoder, crf),
                 "-movflags", "+faststart",  # 优化网页加载
                 "-an",  # 无音频流（避免错误）
                 output_path
             ]
 
-            logger.info(f"启动FFmpeg处理: {output_path} (帧率: {fps:.1f}, 分辨率: {width}x{height})")
+            logger.info(f"启动FFmpeg处理: {output_path} (帧率: {fps:.1f}, 分辨率: {width}x{height}, 编码器: {encoder})")
 
             # 启动FFmpeg进程
             process = subprocess.Popen(
@@ -286,11 +643,14 @@ class VideoProcessor:
 
             # 写入帧数据
             try:
-                for i, frame in enumerate(frames):
+                for i, frame in enumerate(itertools.chain([first_frame], frames_iter)):
                     # 进度输出
                     if i % 50 == 0:  # 每50帧输出一次
-                        progress = (i + 1) / total_frames * 100
-                        logger.info(f"FFmpeg写入进度: {i + 1}/{total_frames} ({progress:.1f}%)")
+                        if total_frames:
+                            progress = (i + 1) / total_frames * 100
+                            logger.info(f"FFmpeg写入进度: {i + 1}/{total_frames} ({progress:.1f}%)")
+                        else:
+                            logger.info(f"FFmpeg写入进度: 第{i + 1}帧")
 
                     # 确保帧格式正确（uint8类型）
                     if frame.dtype != np.uint8:
@@ -299,8 +659,7 @@ class VideoProcessor:
                     # 写入原始RGB数据
                     process.stdin.write(frame.tobytes())
 
-                # 关闭输入流并等待完成
-                process.stdin.close()
+                # 关闭输入流并等待完成（communicate会自行关闭stdin，提前close会导致flush已关闭的文件而报错）
                 stdout, stderr = process.communicate(timeout=600)  # 10分钟超时
 
                 # 检查返回码
@@ -417,6 +776,51 @@ class VideoProcessor:
             logger.warning(f"视频验证失败: {str(e)}")
             return False
 
+    @staticmethod
+    def verify_mp4_structure(video_path: str) -> bool:
+        """轻量验证MP4文件结构：只读取顶层box头（每个8~16字节），不创建解码器
+
+        要求顶层box按声明的大小首尾相接直到文件末尾，且包含ftyp和moov
+
+        Args:
+            video_path: 视频文件路径
+
+        Returns:
+            bool: 结构完整返回True，否则False
+        """
+        try:
+            file_size = os.path.getsize(video_path)
+            box_types = set()
+            with open(video_path, "rb") as f:
+                offset = 0
+                while offset < file_size:
+                    f.seek(offset)
+                    header = f.read(8)
+                    if len(header) < 8:
+                        return False
+                    box_size, box_type = struct.unpack(">I4s", header)
+                    if box_size == 1:
+                        # 64位扩展大小
+                        largesize = f.read(8)
+                        if len(largesize) < 8:
+                            return False
+                        box_size = struct.unpack(">Q", largesize)[0]
+                    elif box_size == 0:
+                        # 最后一个box延伸到文件末尾
+                        box_size = file_size - offset
+                    if box_size < 8:
+                        return False
+                    box_types.add(box_type)
+                    offset += box_size
+
+            result = offset == file_size and {b"ftyp", b"moov"} <= box_types
+            logger.info(f"MP4结构验证: {'通过' if result else '失败'} ({video_path})")
+            return result
+
+        except OSError as e:
+            logger.warning(f"MP4结构验证失败: {str(e)}")
+            return False
+
     @staticmethod
     def convert_to_browser_compatible(input_path: str, output_path: str) -> str:
         """将视频转换为浏览器兼容格式（H.264 + AAC）
@@ -564,8 +968,8 @@ if __name__ == "__main__":
             print(f"❌ 视频验证失败: {video_path}")
 
         print("=== 读取并处理视频 ===")
-        frames, info = VideoProcessor.read_video(video_path)
-        print(f"读取到 {len(frames)} 帧，分辨率: {info['width']}x{info['height']}")
+        info = VideoProcessor.probe(video_path)
+        print(f"视频共 {info['frame_count']} 帧，分辨率: {info['width']}x{info['height']}")
 
 
         # 简单处理：添加灰度滤镜
@@ -574,11 +978,14 @@ if __name__ == "__main__":
             return cv2.cvtColor(gray, cv2.COLOR_GRAY2RGB)  # 转回RGB保持维度
 
 
-        processed_frames = VideoProcessor.process_video_frames(frames, gray_filter)
+        # 逐帧读取→处理→写入，不在内存中保留整段视频
+        processed_frames = VideoProcessor.iter_processed_frames(
+            VideoProcessor.iter_frames(video_path), gray_filter, total_frames=info["frame_count"]
+        )
 
         print("=== 写入处理后的视频 ===")
         processed_path = os.path.splitext(video_path)[0] + "_processed.mp4"
-        VideoProcessor.write_video(processed_frames, processed_path, fps=info["fps"])
+        processed_path = VideoProcessor.write_video_stream(processed_frames, processed_path, fps=info["fps"])
         print(f"处理后的视频: {processed_path}")
 
     except Exception as e: